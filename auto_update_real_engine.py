@@ -6,83 +6,394 @@ VERSION: 6.0 (Canada-Focused Production)
 PURPOSE: This is the ONLY script to run to update the Canada dashboard data.
 """
 import datetime
+import hashlib
 import json
-import time
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 # Import ALL the tools we need from our library file
-from prompt_utils import call_perplexity_api, get_prompt_for_topic, create_structured_fallback, validate_output
+import codec
+from prompt_utils import call_perplexity_api, call_perplexity_batch, get_prompt_for_topic, create_structured_fallback, validate_output, get_api_call_stats, get_response_cache_stats, refresh_resource_map
+from history_store import HistoryStore
+from kpi_normalizer import attach_normalized_kpis
+from metrics import METRICS_FILE, REGISTRY, TOPIC_GENERATIONS, VALIDATION_FAILURES
+from rate_limiter import TokenBucket
+from resource_registry import RESOURCE_DB_PATH, ResourceRegistry, extract_urls
+from schemas import validate_payload
+from snapshot_pack import PACK_PATH, write_pack
+from topic_registry import get_registry
+from storage import archive_version, atomic_write_json
 
 # --- SCRIPT CONFIGURATION ---
 RUN_INTERVAL_HOURS = 6
-STATE_FILE = "last_run_timestamp.txt"
+# Data and state files are written compact; set to 1 for human-readable (indented) files.
+PRETTY_JSON = os.environ.get("REAL_ENGINE_PRETTY_JSON", "0") == "1"
 OUTPUT_JSON_FILE = "real-engine-data.json"
+TOPIC_STATE_FILE = "topic_state.json"
+
+# Concurrent mode replaces the fixed 5-second sleep with a token bucket.
+CONCURRENT_MODE = os.environ.get("REAL_ENGINE_CONCURRENT", "0") == "1"
+API_REQUESTS_PER_SECOND = float(os.environ.get("API_REQUESTS_PER_SECOND", "1.0"))
+API_RATE_BURST = float(os.environ.get("API_RATE_BURST", "2"))
+API_MAX_IN_FLIGHT = int(os.environ.get("API_MAX_IN_FLIGHT", "6"))
+# Batched mode asks for up to this many topics per API request (0 or 1 = one request per topic).
+BATCH_SIZE = int(os.environ.get("REAL_ENGINE_BATCH_SIZE", "0"))
+# RESOURCE_MAP (listed in each prompt) holds what each topic cited in this many of its most recent runs.
+RESOURCE_ROTATION_RUNS = int(os.environ.get("RESOURCE_ROTATION_RUNS", "4"))
+
+# Topics of the active profiles, from topics.json (see topic_registry.py)
+SECTIONS = get_registry().ids()
+
+def _parse_topic_intervals(value: str) -> dict:
+    """Parses "topic=hours,topic=hours" overrides, e.g. "canada_labour=3"."""
+    intervals = {}
+    for item in value.split(","):
+        topic_id, _, hours = item.partition("=")
+        if topic_id.strip() and hours.strip():
+            intervals[topic_id.strip()] = float(hours)
+    return intervals
+
+# Per-topic refresh interval overrides in hours; otherwise a topic's `refresh_hours` in
+# topics.json applies, then RUN_INTERVAL_HOURS.
+TOPIC_REFRESH_HOURS = _parse_topic_intervals(os.environ.get("TOPIC_REFRESH_HOURS", ""))
 
 # --- Time-checking functions ---
-def should_run_now():
+def load_topic_state() -> dict:
+    """Per-topic {"last_success": iso, "content_hash": sha256} from the previous runs."""
     try:
-        with open(STATE_FILE, 'r') as f:
-            last_run_str = f.read().strip()
-            if not last_run_str: return True
-            last_run_time = datetime.datetime.fromisoformat(last_run_str)
-            if datetime.datetime.now(datetime.timezone.utc) < last_run_time + datetime.timedelta(hours=RUN_INTERVAL_HOURS):
-                print(f"🕒 Skipping run. Last successful run was at {last_run_time.strftime('%Y-%m-%d %H:%M:%S UTC')}.")
-                return False
-    except FileNotFoundError:
-        print("🔍 No previous run data found. Starting initial Canada run.")
-        return True
-    return True
-
-def record_successful_run():
-    with open(STATE_FILE, 'w') as f:
-        f.write(datetime.datetime.now(datetime.timezone.utc).isoformat())
-    print(f"\n✅ Canada REAL Engine run complete. Timestamp updated in {STATE_FILE}.")
-
-def generate_dynamic_content_for_topic(topic_id: str) -> dict:
-    """Calls the API for the given Canada topic and validates the response structure."""
-    api_response = call_perplexity_api(get_prompt_for_topic(topic_id), topic_id)
+        with open(TOPIC_STATE_FILE, 'rb') as f:
+            return codec.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_topic_state(state: dict):
+    atomic_write_json(TOPIC_STATE_FILE, state, pretty=PRETTY_JSON)
+
+def load_previous_output() -> dict:
+    try:
+        with open(OUTPUT_JSON_FILE, 'rb') as f:
+            return codec.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def topic_interval_hours(topic_id: str) -> float:
+    if topic_id in TOPIC_REFRESH_HOURS:
+        return TOPIC_REFRESH_HOURS[topic_id]
+    topic = get_registry().get(topic_id)
+    if topic is not None and topic.refresh_hours is not None:
+        return topic.refresh_hours
+    return RUN_INTERVAL_HOURS
+
+def interleave_profiles(sections: list) -> list:
+    """Orders topics round-robin across profiles.
+
+    All profiles share one pool of API calls, so a profile with many stale
+    topics does not hold back the first topics of the others.
+    """
+    registry = get_registry()
+    queues = {}
+    for topic_id in sections:
+        topic = registry.get(topic_id)
+        queues.setdefault(topic.profile if topic else "", []).append(topic_id)
+    ordered = []
+    for round_ in range(max((len(queue) for queue in queues.values()), default=0)):
+        ordered.extend(queue[round_] for queue in queues.values() if round_ < len(queue))
+    return ordered
+
+def stale_topics(state: dict, previous: dict, sections: list = None) -> list:
+    """Topics with no valid payload yet, or whose last success is older than their interval."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    stale = []
+    for topic_id in sections or SECTIONS:
+        last_success = state.get(topic_id, {}).get("last_success")
+        if topic_id not in previous or not last_success:
+            stale.append(topic_id)
+            continue
+        due = datetime.datetime.fromisoformat(last_success) + datetime.timedelta(hours=topic_interval_hours(topic_id))
+        if now >= due:
+            stale.append(topic_id)
+    return stale
+
+def cache_floors(state: dict) -> dict:
+    """{topic_id: epoch seconds}; cached answers created earlier are not reused.
+
+    For a topic that is due, the floor is the moment it became due, so no
+    answer from its previous window is reused. An answer cached by an
+    attempt since then can be (e.g. a cycle that crashed before saving its
+    state). For a topic that is still fresh (only refreshed by `--force`),
+    the floor is when its current payload was fetched (`fetched_at`, stamped
+    when that cycle started), so the answer behind it is reused.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    floors = {}
+    for topic_id, topic_state in state.items():
+        last_success = topic_state.get("last_success")
+        if not last_success:
+            continue
+        due = datetime.datetime.fromisoformat(last_success) + datetime.timedelta(hours=topic_interval_hours(topic_id))
+        fetched = datetime.datetime.fromisoformat(topic_state.get("fetched_at") or last_success)
+        floors[topic_id] = (due if now >= due else fetched).timestamp()
+    return floors
+
+def try_generate_topic(topic_id: str, force_refresh: bool = False, rate_limiter=None, not_before: float = None):
+    """Calls the API for the given Canada topic; returns the validated payload or None.
+
+    `force_refresh` bypasses the persistent response cache and `not_before`
+    ignores cache entries older than that; `rate_limiter` paces the network
+    calls (cache hits do not consume it).
+    """
+    api_response = call_perplexity_api(get_prompt_for_topic(topic_id), topic_id, force_refresh=force_refresh,
+                                       rate_limiter=rate_limiter, not_before=not_before)
+    return accept_response(topic_id, api_response)
+
+def accept_response(topic_id: str, api_response):
+    """Validates one topic's API answer; returns it stamped with `last_updated`, or None."""
     if isinstance(api_response, dict):
         api_response['topic'] = topic_id # Add topic for validation
         if validate_output(api_response):
             print(f"✅ Success and validation passed for Canada {topic_id}.")
             api_response["last_updated"] = datetime.datetime.now().isoformat()
             return api_response
-        else:
-            print(f"❌ API call for Canada {topic_id} succeeded but returned an invalid JSON structure. Using fallback.")
-            return create_structured_fallback(topic_id)
+        errors = validate_payload(api_response, topic_id)
+        VALIDATION_FAILURES.inc(topic=topic_id)
+        print(f"❌ API call for Canada {topic_id} succeeded but returned an invalid JSON structure: {'; '.join(errors[:5])}")
     else:
-        print(f"❌ API call for Canada {topic_id} failed entirely. Using fallback.")
-        return create_structured_fallback(topic_id)
+        print(f"❌ API call for Canada {topic_id} failed entirely.")
+    return None
 
-# --- The Main Function ---
-def main():
-    if not should_run_now():
-        return
-    print("🍁 Starting Canada REAL Engine data generation cycle (Fully Dynamic Mode)...")
-    all_data = {}
-
-    # Canada-focused sections
-    sections = [
-        'canada_immigration', 
-        'canada_labour', 
-        'canada_tech_innovation', 
-        'canada_startup_ecosystem', 
-        'canada_regional_development', 
-        'canada_international_education'
-    ]
+def content_hash(payload: dict) -> str:
+    """Hash of a topic payload, ignoring the per-run `last_updated` stamp."""
+    content = {key: value for key, value in payload.items() if key != "last_updated"}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
 
+def generate_sequentially(sections: list, force_refresh: bool = False, not_before: dict = None) -> dict:
+    """Returns {topic_id: validated payload or None}."""
+    not_before = not_before or {}
+    # A 5-second gap between API calls is a very safe value to ensure we do not get rate-limited.
+    # As a one-token bucket it only delays real network calls, not cache hits.
+    pacing = TokenBucket(rate=1 / 5, capacity=1)
+    results = {}
     for index, topic_id in enumerate(sections):
         print(f"\n--- Processing Canada Widget {index + 1}/{len(sections)}: {topic_id} ---")
-        all_data[topic_id] = generate_dynamic_content_for_topic(topic_id)
+        results[topic_id] = try_generate_topic(topic_id, force_refresh, rate_limiter=pacing,
+                                               not_before=not_before.get(topic_id))
+    return results
+
+def generate_concurrently(sections: list, requests_per_second: float = None, max_in_flight: int = None,
+                          force_refresh: bool = False, not_before: dict = None) -> dict:
+    """Generates all sections in parallel, paced by a token bucket.
+
+    At most `max_in_flight` API calls run at once and new calls start at no
+    more than `requests_per_second` on average. The result has the same keys,
+    order and values as the sequential path.
+    """
+    bucket = TokenBucket(requests_per_second or API_REQUESTS_PER_SECOND, API_RATE_BURST)
+    max_in_flight = max_in_flight or API_MAX_IN_FLIGHT
+    not_before = not_before or {}
+
+    def run(topic_id: str) -> dict:
+        print(f"\n--- Processing Canada Widget: {topic_id} ---")
+        return try_generate_topic(topic_id, force_refresh, rate_limiter=bucket, not_before=not_before.get(topic_id))
 
-        # A 5-second delay is a very safe value to ensure we do not get rate-limited.
-        if index < len(sections) - 1:
-             print(f"--> API call for Canada {topic_id} processed. Waiting 5 seconds to be safe...")
-             time.sleep(5)
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="real-engine") as pool:
+        futures = {topic_id: pool.submit(run, topic_id) for topic_id in sections}
+        return {topic_id: future.result() for topic_id, future in futures.items()}
 
-    with open(OUTPUT_JSON_FILE, 'w') as f:
-        json.dump(all_data, f, indent=2)
-    print(f"\n✅ Canada REAL Engine data generation complete. File saved to '{OUTPUT_JSON_FILE}'.")
-    record_successful_run()
+def record_resources(payloads: list):
+    """Registers every URL the validated payloads cite as one run of the resource registry."""
+    try:
+        registry = ResourceRegistry()
+        try:
+            run_id = registry.start_run()
+            totals = {"cited": 0, "new": 0, "returning": 0, "repeated": 0}
+            for topic_id, payload in payloads:
+                for key, count in registry.record(run_id, topic_id, extract_urls(payload)).items():
+                    totals[key] += count
+        finally:
+            registry.close()
+        print(f"🔗 Registered {totals['cited']} cited resources: {totals['new']} new, "
+              f"{totals['returning']} rotated back in, {totals['repeated']} repeated from the topic's last run.")
+    except Exception as e:
+        print(f"❌ Could not update the Canada resource registry: {e}")
+
+def load_resource_map():
+    """Fills RESOURCE_MAP from the resource registry, so this cycle's prompts list each topic's recent sources."""
+    if not os.path.exists(RESOURCE_DB_PATH):
+        return
+    try:
+        registry = ResourceRegistry(RESOURCE_DB_PATH, readonly=True)
+        try:
+            refresh_resource_map(registry, RESOURCE_ROTATION_RUNS)
+        finally:
+            registry.close()
+    except Exception as e:
+        print(f"❌ Could not load recent Canada resources: {e}")
+
+def generate_batched(sections: list, batch_size: int, concurrent: bool = False, force_refresh: bool = False,
+                     not_before: dict = None) -> dict:
+    """Asks for up to `batch_size` topics per API request.
+
+    Each topic in a batched answer is validated on its own; topics that are
+    missing or invalid are generated again with individual calls. Batches
+    run in parallel in concurrent mode and one after another otherwise.
+    """
+    if concurrent:
+        bucket = TokenBucket(API_REQUESTS_PER_SECOND, API_RATE_BURST)
+    else:
+        bucket = TokenBucket(rate=1 / 5, capacity=1)
+    batches = [sections[i:i + batch_size] for i in range(0, len(sections), batch_size)]
+
+    def run(batch: list) -> dict:
+        print(f"\n--- Processing Canada Widgets (batched): {', '.join(batch)} ---")
+        answers = call_perplexity_batch(batch, force_refresh, rate_limiter=bucket, not_before=not_before)
+        results = {}
+        for topic_id in batch:
+            if answers.get(topic_id) is None:
+                print(f"--> Canada {topic_id} missing or unusable in the batched answer.")
+                results[topic_id] = None
+            else:
+                results[topic_id] = accept_response(topic_id, answers[topic_id])
+        return results
+
+    results = {}
+    workers = min(API_MAX_IN_FLIGHT, len(batches)) if concurrent else 1
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="real-engine-batch") as pool:
+        for batch_results in pool.map(run, batches):
+            results.update(batch_results)
+
+    failed = [topic_id for topic_id in sections if results.get(topic_id) is None]
+    if failed:
+        print(f"--> Retrying {len(failed)} Canada topic(s) with individual calls: {', '.join(failed)}")
+        if concurrent:
+            results.update(generate_concurrently(failed, force_refresh=force_refresh, not_before=not_before))
+        else:
+            results.update(generate_sequentially(failed, force_refresh=force_refresh, not_before=not_before))
+    return {topic_id: results.get(topic_id) for topic_id in sections}
+
+def publish_snapshot_pack(data: dict):
+    """Writes the pre-encoded pack the web workers map instead of each parsing the data file."""
+    try:
+        # Same transform as app.py's SnapshotCache, so the pack holds exactly what /data serves.
+        write_pack(PACK_PATH, data, OUTPUT_JSON_FILE, transform=attach_normalized_kpis)
+    except Exception as e:
+        print(f"❌ Could not publish the Canada snapshot pack: {e}")
+
+def record_history(payloads: list, timestamp: datetime.datetime):
+    """Appends the numeric KPIs and chart points of each validated payload to the history store."""
+    try:
+        store = HistoryStore()
+        try:
+            count = sum(store.append(topic_id, payload, timestamp) for topic_id, payload in payloads)
+        finally:
+            store.close()
+        print(f"📈 Recorded {count} history points for {len(payloads)} topic(s).")
+    except Exception as e:
+        print(f"❌ Could not record Canada history points: {e}")
+
+# --- The Main Function ---
+def main(concurrent: bool = None, force: bool = False, force_refresh: bool = False, batch_size: int = None):
+    """Runs one generation cycle; returns the newly published data, or None if nothing was written."""
+    state = load_topic_state()
+    previous = load_previous_output()
+    sections = list(SECTIONS) if force else stale_topics(state, previous)
+    if not sections:
+        print("🕒 Skipping run. Every Canada topic is still fresh.")
+        return None
+    sections = interleave_profiles(sections)
+    if concurrent is None:
+        concurrent = CONCURRENT_MODE
+    if batch_size is None:
+        batch_size = BATCH_SIZE
+    mode = "Concurrent" if concurrent else "Sequential"
+    if batch_size > 1:
+        mode += f", batches of {batch_size}"
+    print(f"🍁 Starting Canada REAL Engine data generation cycle (Fully Dynamic Mode, {mode})...")
+    print(f"--> Refreshing {len(sections)}/{len(SECTIONS)} stale topics: {', '.join(sections)}")
+
+    load_resource_map()
+    not_before = cache_floors(state)
+    # The client and cache live as long as the process (several cycles under the embedded
+    # scheduler); report only this cycle's share.
+    cycle_started = time.perf_counter()
+    fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    cache_before = get_response_cache_stats()
+    if batch_size > 1:
+        results = generate_batched(sections, batch_size, concurrent=concurrent, force_refresh=force_refresh,
+                                   not_before=not_before)
+    elif concurrent:
+        results = generate_concurrently(sections, force_refresh=force_refresh, not_before=not_before)
+    else:
+        results = generate_sequentially(sections, force_refresh=force_refresh, not_before=not_before)
+
+    stats = get_api_call_stats(since=cycle_started)
+    print(f"\n📊 API calls: {stats['calls']}, retries: {stats['retries']}, failures: {stats['failures']}, "
+          f"total latency: {stats['total_latency']:.2f}s, slowest: {stats['max_latency']:.2f}s")
+    cache_stats = get_response_cache_stats(since=cache_before)
+    if cache_stats:
+        print(f"📦 Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['entries']} entries ({cache_stats['bytes']} bytes)")
+
+    now_dt = datetime.datetime.now(datetime.timezone.utc)
+    now = now_dt.isoformat()
+    all_data = {}
+    changed = []
+    succeeded = []
+    for topic_id in SECTIONS:
+        payload = results.get(topic_id)
+        old = previous.get(topic_id)
+        topic_state = state.setdefault(topic_id, {})
+        if payload is None:
+            if old is not None:
+                # Keep the last good payload instead of replacing it with a fallback.
+                if topic_id in results:
+                    if topic_state.get("last_success") or topic_state.get("content_hash"):
+                        print(f"--> Keeping previous Canada {topic_id} payload.")
+                        TOPIC_GENERATIONS.inc(topic=topic_id, outcome="kept_previous")
+                    else:
+                        # The previous payload is itself a structured fallback.
+                        TOPIC_GENERATIONS.inc(topic=topic_id, outcome="fallback")
+                all_data[topic_id] = old
+            else:
+                all_data[topic_id] = create_structured_fallback(topic_id)
+                TOPIC_GENERATIONS.inc(topic=topic_id, outcome="fallback")
+                changed.append(topic_id)
+            continue
+        TOPIC_GENERATIONS.inc(topic=topic_id, outcome="success")
+        digest = content_hash(payload)
+        topic_state["last_success"] = now
+        topic_state["fetched_at"] = fetched_at
+        succeeded.append((topic_id, payload))
+        if old is not None and topic_state.get("content_hash") == digest:
+            print(f"--> Canada {topic_id} content unchanged.")
+            all_data[topic_id] = old
+            continue
+        topic_state["content_hash"] = digest
+        all_data[topic_id] = payload
+        changed.append(topic_id)
+
+    if changed:
+        # Readers (app.py) only ever see the complete old file or the complete new one.
+        atomic_write_json(OUTPUT_JSON_FILE, all_data, pretty=PRETTY_JSON)
+        archive_version(OUTPUT_JSON_FILE)
+        print(f"\n✅ Canada REAL Engine data generation complete. {len(changed)} topic(s) changed; file saved to '{OUTPUT_JSON_FILE}'.")
+        if PACK_PATH:
+            publish_snapshot_pack(all_data)
+    else:
+        print(f"\n✅ Canada REAL Engine data generation complete. No topic changed; '{OUTPUT_JSON_FILE}' left untouched.")
+        if PACK_PATH and not os.path.exists(PACK_PATH):
+            publish_snapshot_pack(all_data)
+    if succeeded:
+        record_history(succeeded, now_dt)
+        record_resources(succeeded)
+    save_topic_state(state)
+    if succeeded:
+        print(f"\n✅ Canada REAL Engine run complete. {len(succeeded)}/{len(sections)} topic(s) refreshed.")
+    else:
+        print(f"\n❌ Canada REAL Engine run finished without refreshing any of {len(sections)} topic(s).")
+    if METRICS_FILE:
+        REGISTRY.write_textfile(METRICS_FILE)
+    return all_data if changed else None
 
 if __name__ == "__main__":
-    main()
+    main(force="--force" in sys.argv, force_refresh="--no-cache" in sys.argv)
@@ -0,0 +1,108 @@
+"""
+Canada REAL Engine - Embedded Refresh Scheduler
+PURPOSE: Optionally runs the generation cycle inside the web process on a
+         background thread, every RUN_INTERVAL_HOURS plus random jitter.
+         A cross-process file lock makes the cycle single-flight, so when
+         several gunicorn workers run the scheduler only one of them calls
+         the API; the others pick up the new file through their snapshot
+         caches. The worker that ran the cycle swaps the new snapshot into
+         memory directly.
+"""
+import os
+import random
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+ENABLED = os.environ.get("REAL_ENGINE_EMBEDDED_SCHEDULER", "0") == "1"
+JITTER_SECONDS = float(os.environ.get("REAL_ENGINE_SCHEDULER_JITTER", "120"))
+LOCK_FILE = os.environ.get("REAL_ENGINE_SCHEDULER_LOCK", "refresh.lock")
+
+
+class SingleFlightLock:
+    """Non-blocking lock held by at most one thread across all processes sharing `path`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self) -> bool:
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        if fcntl is None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            self._thread_lock.release()
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+class RefreshScheduler:
+    def __init__(self, snapshot_cache, interval_hours: float = None, jitter_seconds: float = JITTER_SECONDS,
+                 lock_file: str = LOCK_FILE):
+        self.snapshot_cache = snapshot_cache
+        self.interval_hours = interval_hours
+        self.jitter_seconds = jitter_seconds
+        self.lock = SingleFlightLock(lock_file)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _interval_seconds(self) -> float:
+        if self.interval_hours is not None:
+            return self.interval_hours * 3600
+        import auto_update_real_engine as engine
+        # Wake often enough for the most frequently refreshed topic; main() skips fresh ones.
+        # (TOPIC_REFRESH_HOURS overrides, else each topic's refresh_hours in topics.json).
+        return min((engine.topic_interval_hours(topic_id) for topic_id in engine.SECTIONS),
+                   default=engine.RUN_INTERVAL_HOURS) * 3600
+
+    def run_cycle(self) -> bool:
+        """Runs one generation cycle if no other worker is; returns True if it ran."""
+        if not self.lock.acquire():
+            print("🕒 Refresh already running in another worker. Skipping.")
+            return False
+        try:
+            import auto_update_real_engine as engine
+            data = engine.main()
+            if data is not None:
+                self.snapshot_cache.publish(data)
+        except Exception as e:
+            print(f"❌ Embedded Canada refresh cycle failed: {e}")
+        finally:
+            self.lock.release()
+        return True
+
+    def _loop(self) -> None:
+        # Spread workers out so they do not all race for the lock at boot.
+        delay = random.uniform(0, self.jitter_seconds)
+        while not self._stop.wait(delay):
+            self.run_cycle()
+            delay = self._interval_seconds() + random.uniform(0, self.jitter_seconds)
+
+    def start(self) -> "RefreshScheduler":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="real-engine-refresh", daemon=True)
+            self._thread.start()
+            print("⏱️ Embedded Canada REAL Engine refresh scheduler started.")
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,65 @@
+"""
+Canada REAL Engine - Batched Prompting Benchmark
+PURPOSE: Compares one-request-per-topic generation with batched requests
+         (several topics per prompt) against the local Perplexity stub.
+         The stub charges a fixed round-trip latency per request plus a
+         generation latency per answered topic, and can leave topics out
+         of batched answers to exercise the per-topic fallback. Reports
+         cycle time, HTTP requests, tokens and fallbacks for each mode.
+
+Usage: python benchmarks/bench_batching.py [--latency 1.0] [--per-topic-latency 0.5]
+                                           [--batch-sizes 1,3,6] [--omit-rate 0.1]
+"""
+import argparse
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_generation import run_cycle  # noqa: E402  (also disables the response cache)
+from stub_perplexity import start_stub_server  # noqa: E402
+
+
+def token_total() -> float:
+    from metrics import API_TOKENS
+
+    return sum(API_TOKENS.value(topic=topic, kind=kind) for topic, kind in API_TOKENS.label_sets())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--latency", type=float, default=1.0, help="stub round-trip latency per request (s)")
+    parser.add_argument("--per-topic-latency", type=float, default=0.5, help="stub generation time per topic (s)")
+    parser.add_argument("--batch-sizes", default="1,3,6")
+    parser.add_argument("--omit-rate", type=float, default=0.0, help="fraction of topics dropped from batches")
+    parser.add_argument("--rps", type=float, default=1.0, help="token bucket rate for concurrent mode")
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency, per_topic_latency=args.per_topic_latency,
+                               batch_omit_rate=args.omit_rate)
+    os.environ["PERPLEXITY_API_URL"] = server.url
+    import prompt_utils
+    import auto_update_real_engine as engine
+    prompt_utils.PERPLEXITY_API_URL = server.url
+    engine.API_REQUESTS_PER_SECOND = args.rps
+
+    modes = [False, True] if not args.skip_sequential else [True]
+    print(f"{'mode':<11} {'batch':>5} {'cycle s':>8} {'requests':>9} {'tokens':>8} {'fallbacks':>10}")
+    try:
+        for concurrent in modes:
+            for batch_size in (int(size) for size in args.batch_sizes.split(",") if size.strip()):
+                engine.BATCH_SIZE = batch_size
+                requests_before, tokens_before = server.request_count, token_total()
+                elapsed, data = run_cycle(concurrent=concurrent)
+                fallbacks = sum(1 for payload in data.values() if payload.get("source") == "Canada REAL Engine")
+                print(f"{'concurrent' if concurrent else 'sequential':<11} {batch_size:>5} {elapsed:>8.2f} "
+                      f"{server.request_count - requests_before:>9} {token_total() - tokens_before:>8.0f} "
+                      f"{fallbacks:>10}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Canada REAL Engine - JSON Codec Benchmark
+PURPOSE: Compares parse and encode time of the stdlib `json` module with
+         the codec selected by codec.py (orjson/msgspec when installed) on
+         `real-engine-data.json` scaled to x1, x10 and x100 topics, plus a
+         typical Perplexity answer. Also shows the old pretty-printed write
+         path against the new compact default.
+
+Usage: python benchmarks/bench_codec.py [--repeat 50]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import codec  # noqa: E402
+
+
+def best_us(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "real-engine-data.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    cases = {"one answer": next(iter(data.values()))}
+    for factor in (1, 10, 100):
+        cases[f"data x{factor}"] = {f"{topic_id}_{i}": payload for i in range(factor) for topic_id, payload in data.items()}
+
+    print(f"codec backend: {codec.BACKEND}")
+    print(f"{'payload':<12} {'bytes':>9} {'op':<22} {'stdlib us':>11} {'codec us':>11} {'speedup':>8}")
+    for name, obj in cases.items():
+        raw = codec.dumps(obj)
+        repeat = max(5, args.repeat // (len(raw) // 50000 + 1))
+        ops = {
+            "parse": (lambda: json.loads(raw), lambda: codec.loads(raw)),
+            "encode compact": (lambda: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                               lambda: codec.dumps(obj)),
+            "encode pretty": (lambda: json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8"),
+                              lambda: codec.dumps(obj, pretty=True)),
+            # What main() used to write versus what it writes now.
+            "write (old vs new)": (lambda: json.dumps(obj, indent=2).encode("utf-8"), lambda: codec.dumps(obj)),
+        }
+        for op, (baseline, candidate) in ops.items():
+            before, after = best_us(baseline, repeat), best_us(candidate, repeat)
+            print(f"{name:<12} {len(raw):>9} {op:<22} {before:>11.1f} {after:>11.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
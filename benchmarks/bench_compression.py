@@ -0,0 +1,80 @@
+"""
+Canada REAL Engine - Compression Benchmark
+PURPOSE: Reports bytes saved by the gzip/brotli variants of `/data` and `/`
+         and compares latency under concurrent load for precompressed
+         variants versus compressing each response on the fly.
+
+Usage: python benchmarks/bench_compression.py [--requests 2000] [--concurrency 16]
+"""
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from flask import Response  # noqa: E402
+from app import app, snapshot_cache  # noqa: E402
+from compression import brotli  # noqa: E402
+
+
+@app.route("/__bench/data-on-the-fly")
+def data_on_the_fly():
+    """Baseline: gzip the snapshot on every request, like a generic compression middleware."""
+    body = gzip.compress(snapshot_cache.get().body, compresslevel=6)
+    return Response(body, mimetype="application/json", headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+
+
+def report_sizes(client):
+    for path in ("/data", "/"):
+        sizes = {}
+        for encoding in ("identity", "gzip", "br"):
+            response = client.get(path, headers={"Accept-Encoding": encoding})
+            if response.headers.get("Content-Encoding", "identity") == encoding:
+                sizes[encoding] = len(response.data)
+        identity = sizes["identity"]
+        parts = [f"identity {identity} B"]
+        for encoding in ("gzip", "br"):
+            if encoding in sizes:
+                parts.append(f"{encoding} {sizes[encoding]} B (-{100 * (1 - sizes[encoding] / identity):.1f}%)")
+        print(f"{path:<6}: " + ", ".join(parts))
+    if brotli is None:
+        print("(brotli not installed; only gzip variants were built)")
+
+
+def load(path: str, n: int, concurrency: int) -> tuple:
+    client = app.test_client()
+    client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    def one(_):
+        start = time.perf_counter()
+        client.get(path, headers={"Accept-Encoding": "gzip"})
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(one, range(n)))
+    elapsed = time.perf_counter() - start
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    return n / elapsed, statistics.median(latencies) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure precompressed vs on-the-fly compression")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    report_sizes(app.test_client())
+    for label, path in (("precompressed", "/data"), ("on-the-fly", "/__bench/data-on-the-fly")):
+        rps, p50, p99 = load(path, args.requests, args.concurrency)
+        print(f"{label:<14}: {rps:8.1f} req/s  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
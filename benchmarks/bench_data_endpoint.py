@@ -0,0 +1,61 @@
+"""
+Canada REAL Engine - /data Endpoint Benchmark
+PURPOSE: Compares requests/sec of the snapshot-cached `/data` route against
+         the previous read-parse-jsonify-per-request implementation, using
+         the Flask test client (no network in the loop).
+
+Usage: python benchmarks/bench_data_endpoint.py [--requests 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from flask import Flask, jsonify  # noqa: E402
+from app import app  # noqa: E402
+
+
+def build_legacy_app() -> Flask:
+    """The pre-cache `/data` handler: abspath + exists + json.load + jsonify per request."""
+    legacy = Flask("legacy")
+
+    @legacy.route("/data")
+    def get_data():
+        file_path = os.path.abspath("real-engine-data.json")
+        if not os.path.exists(file_path):
+            return jsonify({"error": "not found"}), 404
+        with open(file_path, "r", encoding="utf-8") as f:
+            return jsonify(json.load(f))
+
+    return legacy
+
+
+def measure(flask_app: Flask, n: int) -> float:
+    client = flask_app.test_client()
+    client.get("/data")  # warm up (first load populates the cache)
+    start = time.perf_counter()
+    for _ in range(n):
+        response = client.get("/data")
+        assert response.status_code == 200
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    legacy_rps = measure(build_legacy_app(), args.requests)
+    cached_rps = measure(app, args.requests)
+    print(f"legacy /data : {legacy_rps:10.1f} req/s")
+    print(f"cached /data : {cached_rps:10.1f} req/s")
+    print(f"speedup      : {cached_rps / legacy_rps:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
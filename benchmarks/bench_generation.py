@@ -0,0 +1,83 @@
+"""
+Canada REAL Engine - Generation Cycle Benchmark
+PURPOSE: Runs `auto_update_real_engine.main()` against the local Perplexity
+         stub and reports wall-clock time per cycle for the sequential and
+         concurrent modes. Each run happens in a scratch directory so the
+         real data and state files are untouched.
+
+Usage: python benchmarks/bench_generation.py [--latency 2.0] [--skip-sequential]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("PERPLEXITY_API_KEY", "stub-key")
+# Time real (stubbed) calls, not the persistent response cache.
+os.environ["PERPLEXITY_CACHE_PATH"] = ""
+
+from stub_perplexity import start_stub_server  # noqa: E402
+
+
+def run_cycle(concurrent: bool) -> tuple:
+    import auto_update_real_engine as engine
+
+    with tempfile.TemporaryDirectory() as scratch:
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine.main(concurrent=concurrent)
+            elapsed = time.perf_counter() - start
+            with open(engine.OUTPUT_JSON_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        finally:
+            os.chdir(cwd)
+    return elapsed, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time generation cycles against a local stub")
+    parser.add_argument("--latency", type=float, default=2.0, help="stub response latency in seconds")
+    parser.add_argument("--rps", type=float, default=6.0, help="token bucket rate for concurrent mode")
+    parser.add_argument("--burst", type=float, default=6.0, help="token bucket capacity for concurrent mode")
+    parser.add_argument("--skip-sequential", action="store_true", help="skip the slow sequential mode")
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency)
+    os.environ["PERPLEXITY_API_URL"] = server.url
+    import prompt_utils
+    import auto_update_real_engine as engine
+    prompt_utils.PERPLEXITY_API_URL = server.url
+    engine.API_REQUESTS_PER_SECOND = args.rps
+    engine.API_RATE_BURST = args.burst
+
+    try:
+        results = {}
+        if not args.skip_sequential:
+            results["sequential"] = run_cycle(concurrent=False)
+        results["concurrent"] = run_cycle(concurrent=True)
+    finally:
+        server.shutdown()
+
+    for mode, (elapsed, data) in results.items():
+        fallbacks = sum(1 for payload in data.values() if payload.get("source") == "Canada REAL Engine")
+        print(f"{mode:<11}: {elapsed:6.2f}s for {len(data)} topics ({fallbacks} fallbacks)")
+    if len(results) == 2:
+        seq, conc = results["sequential"][1], results["concurrent"][1]
+        same = list(seq) == list(conc)
+        print(f"same topics and order: {same}")
+    print(f"slowest single topic  : ~{args.latency:.2f}s (stub latency)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Canada REAL Engine - History Query Benchmark
+PURPOSE: Fills a scratch history database with a year of 6-hourly
+         snapshots (built from `real-engine-data.json` with jittered
+         values) and times raw, paged (the /history default) and
+         downsampled range queries.
+
+Usage: python benchmarks/bench_history.py [--days 365] [--points 200]
+"""
+import argparse
+import copy
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from history_store import PAGE_SIZE, HistoryStore, extract_number  # noqa: E402
+
+
+def fill(store: HistoryStore, days: int) -> int:
+    with open(os.path.join(ROOT, "real-engine-data.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rng = random.Random(0)
+    start = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    count = 0
+    for step in range(days * 4):
+        timestamp = start + datetime.timedelta(hours=6 * step)
+        for topic_id, payload in data.items():
+            payload = copy.deepcopy(payload)
+            for kpi in payload.get("kpis", []):
+                number = extract_number(kpi.get("value"))
+                if number is not None:
+                    kpi["value"] = round(number * rng.uniform(0.9, 1.1), 2)
+            count += store.append(topic_id, payload, timestamp)
+    return count
+
+
+def best_ms(func, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time history range queries")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--points", type=int, default=200, help="downsampling buckets")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "history.sqlite3")
+        writer = HistoryStore(path)
+        start = time.perf_counter()
+        rows = fill(writer, args.days)
+        print(f"inserted {rows} points in {time.perf_counter() - start:.2f}s")
+        writer.close()
+
+        store = HistoryStore(path, readonly=True)
+        topic_id = "canada_labour"
+        metric = store.metrics(topic_id)[0]
+        queries = [
+            ("raw, one metric", dict(metric=metric)),
+            ("raw, all metrics", {}),
+            ("first page, all metrics", dict(page=True)),
+            (f"{args.points} buckets, all metrics", dict(buckets=args.points)),
+        ]
+        for label, kwargs in queries:
+            if kwargs.get("page"):
+                cold = best_ms(lambda: store._page(topic_id, None, None, None, PAGE_SIZE, None))
+                warm = best_ms(lambda: store.page(topic_id))
+            else:
+                cold = best_ms(lambda: store._query(topic_id, None, None, kwargs.get("metric"), kwargs.get("buckets")))
+                warm = best_ms(lambda: store.query(topic_id, **kwargs))
+            print(f"{label:<28}: {cold:6.2f} ms uncached, {warm:6.3f} ms cached")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Canada REAL Engine - KPI Normalizer Benchmark
+PURPOSE: Measures KPI values normalized per second for a realistic
+         backfill (few distinct strings, many repeats) and for a batch of
+         all-distinct strings, comparing the pure-Python and pandas paths.
+
+Usage: python benchmarks/bench_kpi_normalizer.py [--size 100000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import kpi_normalizer  # noqa: E402
+from kpi_normalizer import normalize_value, normalize_values  # noqa: E402
+
+
+def rate(func, values: list) -> float:
+    start = time.perf_counter()
+    func(values)
+    return len(values) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KPI normalization throughput")
+    parser.add_argument("--size", type=int, default=100000)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "real-engine-data.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rng = random.Random(0)
+    seen = [kpi["value"] for payload in data.values() for kpi in payload.get("kpis", [])]
+    backfill = [rng.choice(seen) for _ in range(args.size)]
+    distinct = [f"{rng.choice(['', '+', '−', '$'])}{rng.randint(1, 999999):,}{rng.choice(['', '%', ' YoY', '% QoQ', 'B'])}"
+                for _ in range(args.size)]
+
+    try:
+        import pandas  # noqa: F401
+        has_pandas = True
+    except ImportError:
+        has_pandas = False
+
+    for label, values in (("backfill (repeated)", backfill), ("all distinct", distinct)):
+        print(f"{label}:")
+        print(f"  per value, no dedup : {rate(lambda v: [normalize_value(x) for x in v], values):12.0f} values/s")
+        kpi_normalizer.VECTORIZE_THRESHOLD = 0
+        print(f"  normalize_values    : {rate(normalize_values, values):12.0f} values/s")
+        if has_pandas:
+            kpi_normalizer.VECTORIZE_THRESHOLD = 1
+            print(f"  ...with pandas      : {rate(normalize_values, values):12.0f} values/s")
+            kpi_normalizer.VECTORIZE_THRESHOLD = 0
+
+
+if __name__ == "__main__":
+    main()
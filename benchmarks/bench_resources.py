@@ -0,0 +1,123 @@
+"""
+Canada REAL Engine - Resource Registry Benchmark
+PURPOSE: Fills a scratch resource registry with a few hundred thousand
+         cited URLs over many runs, then times run recording and the
+         "used in the last N runs" lookup. Also compares checking a batch
+         of links serially with the bounded concurrent checker, against a
+         local HTTP server that answers 200/404/405 after a delay.
+
+Usage: python benchmarks/bench_resources.py [--resources 300000] [--links 64] [--link-latency 0.1]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from resource_registry import ResourceRegistry, check_links  # noqa: E402
+
+TOPICS = ["canada_immigration", "canada_labour", "canada_tech_innovation", "canada_startup_ecosystem",
+          "canada_regional_development", "canada_international_education"]
+DOMAINS = ["statcan.gc.ca", "canada.ca", "oecd.org", "bankofcanada.ca", "cbie.ca", "td.com", "utoronto.ca"]
+
+
+class LinkHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _answer(self, with_body: bool):
+        time.sleep(self.server.latency)
+        if self.path.startswith("/missing"):
+            status = 404
+        elif self.path.startswith("/nohead") and self.command == "HEAD":
+            status = 405
+        else:
+            status = 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2" if with_body else "0")
+        self.end_headers()
+        if with_body:
+            self.wfile.write(b"ok")
+
+    def do_HEAD(self):
+        self._answer(False)
+
+    def do_GET(self):
+        self._answer(True)
+
+
+def fill(registry: ResourceRegistry, resources: int, per_topic: int, rng: random.Random) -> tuple:
+    pool = [f"https://www.{rng.choice(DOMAINS)}/report/{i}?utm_source=pplx" for i in range(resources)]
+    runs = 0
+    start = time.perf_counter()
+    cursor = 0
+    while cursor < resources:
+        run_id = registry.start_run()
+        for topic_id in TOPICS:
+            # Mostly fresh URLs plus a few from earlier runs, like the prompts' rotation rule.
+            fresh = pool[cursor:cursor + per_topic]
+            cursor += per_topic
+            repeats = [pool[rng.randrange(cursor)] for _ in range(4)]
+            registry.record(run_id, topic_id, fresh + repeats)
+        runs += 1
+    return runs, time.perf_counter() - start, pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--resources", type=int, default=300000)
+    parser.add_argument("--per-topic", type=int, default=200, help="new URLs per topic per run")
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--links", type=int, default=64)
+    parser.add_argument("--link-latency", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as scratch:
+        registry = ResourceRegistry(os.path.join(scratch, "resources.sqlite3"))
+        runs, elapsed, pool = fill(registry, args.resources, args.per_topic, rng)
+        stats = registry.stats()
+        print(f"fill          : {stats['resources']} resources over {runs} runs in {elapsed:.1f}s "
+              f"({elapsed / runs * 1000:.1f} ms per run)")
+
+        probes = [rng.choice(pool) for _ in range(args.lookups)]
+        start = time.perf_counter()
+        hits = sum(registry.used_within(url, 4) for url in probes)
+        elapsed = time.perf_counter() - start
+        print(f"used_within   : {args.lookups / elapsed:,.0f} lookups/s ({hits} used in the last 4 runs)")
+        start = time.perf_counter()
+        recent = registry.recent("canada_labour", 4, limit=50)
+        print(f"recent        : {len(recent)} URLs in {(time.perf_counter() - start) * 1000:.2f} ms")
+        registry.close()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LinkHandler)
+    server.daemon_threads = True
+    server.latency = args.link_latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    kinds = ["ok", "missing", "nohead"]
+    links = [f"{base}/{kinds[i % 3]}/{i}" for i in range(args.links)]
+    try:
+        start = time.perf_counter()
+        serial = check_links(links, max_workers=1)
+        serial_s = time.perf_counter() - start
+        start = time.perf_counter()
+        pooled = check_links(links, max_workers=args.workers)
+        pooled_s = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    assert serial == pooled
+    broken = sum(1 for status in pooled.values() if status is None or status >= 400)
+    print(f"links serial  : {serial_s:.2f}s for {len(links)} links")
+    print(f"links pooled  : {pooled_s:.2f}s with {args.workers} workers ({broken} broken)")
+
+
+if __name__ == "__main__":
+    main()
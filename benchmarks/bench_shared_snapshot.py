@@ -0,0 +1,97 @@
+"""
+Canada REAL Engine - Shared Snapshot Memory Benchmark
+PURPOSE: Starts N worker processes that each load a scaled data snapshot
+         the way app.py does, once by parsing the JSON file and once by
+         mapping the snapshot pack, and reports the private memory each
+         worker adds and the total across workers (PSS, Linux only). With
+         the pack, the total should stay flat as workers are added.
+
+Usage: python benchmarks/bench_shared_snapshot.py [--workers 1,4,8] [--scale 200]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import codec  # noqa: E402
+
+
+def memory_kb() -> dict:
+    """Pss and private (Private_Clean + Private_Dirty) memory of this process, in kB."""
+    fields = {}
+    with open("/proc/self/smaps_rollup", "r", encoding="ascii") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0])
+    return {"pss": fields.get("Pss", 0), "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+
+def child(data_path: str, pack_path: str):
+    from kpi_normalizer import attach_normalized_kpis
+    from snapshot_cache import SnapshotCache
+
+    before = memory_kb()
+    snapshot = SnapshotCache(data_path, transform=attach_normalized_kpis, pack_path=pack_path).get()
+    # Touch every body, as serving each topic in each encoding would.
+    touched = sum(sum(memoryview(body)[::4096]) for encoded in [snapshot.full, *snapshot.topics.values()]
+                  for body in encoded.variants.values())
+    after = memory_kb()
+    print(codec.dumps_str({"private_kb": after["private"] - before["private"], "pss_kb": after["pss"],
+                           "touched": touched}), flush=True)
+    sys.stdin.read()  # stay alive until every worker has reported, so PSS splits shared pages
+
+
+def run_workers(count: int, data_path: str, pack_path: str) -> dict:
+    script = os.path.abspath(__file__)
+    procs = [subprocess.Popen([sys.executable, script, "--child", data_path, pack_path], cwd=ROOT,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True) for _ in range(count)]
+    reports = []
+    for proc in procs:
+        line = proc.stdout.readline()
+        while line and not line.startswith("{"):
+            line = proc.stdout.readline()  # skip the load messages
+        reports.append(codec.loads(line))
+    for proc in procs:
+        proc.communicate("")
+    return {"private_kb": sum(r["private_kb"] for r in reports) / count,
+            "total_pss_kb": sum(r["pss_kb"] for r in reports)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,4,8")
+    parser.add_argument("--scale", type=int, default=200, help="copies of each topic in the scaled document")
+    parser.add_argument("--child", nargs=2, metavar=("DATA", "PACK"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    from kpi_normalizer import attach_normalized_kpis
+    from snapshot_pack import write_pack
+    from storage import atomic_write_json
+
+    with open(os.path.join(ROOT, "real-engine-data.json"), "rb") as f:
+        data = codec.loads(f.read())
+    document = {f"{topic_id}_{i}": payload for i in range(args.scale) for topic_id, payload in data.items()}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "real-engine-data.json")
+        pack_path = os.path.join(tmp, "real-engine-data.pack")
+        atomic_write_json(data_path, document)
+        write_pack(pack_path, document, data_path, transform=attach_normalized_kpis)
+        print(f"Document: {len(document)} topics, {os.path.getsize(data_path)} bytes; "
+              f"pack {os.path.getsize(pack_path)} bytes")
+        print(f"{'workers':>8} {'mode':>6} {'private kB/worker':>18} {'total PSS kB':>13}")
+        for count in (int(n) for n in args.workers.split(",")):
+            for mode, pack in (("json", ""), ("pack", pack_path)):
+                result = run_workers(count, data_path, pack)
+                print(f"{count:>8} {mode:>6} {result['private_kb']:>18.0f} {result['total_pss_kb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
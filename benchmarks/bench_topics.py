@@ -0,0 +1,83 @@
+"""
+Canada REAL Engine - Topic Registry Scaling Benchmark
+PURPOSE: Builds topic registries of increasing size (the six Canada topics
+         plus generated ones, spread over several profiles) and times what
+         runs per topic on the hot paths: prompt lookup, the staleness
+         check, the per-topic `/data/<topic_id>` body lookup and the
+         dashboard render. Per-topic costs should stay flat as topics are
+         added.
+
+Usage: python benchmarks/bench_topics.py [--sizes 6,200,1000] [--profiles 4]
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import codec  # noqa: E402
+import topic_registry  # noqa: E402
+from dashboard import DashboardPage  # noqa: E402
+from snapshot_cache import Snapshot, encode_json  # noqa: E402
+
+
+def build_config(size: int, profiles: int) -> dict:
+    with open(os.path.join(ROOT, "topics.json"), "rb") as f:
+        config = codec.loads(f.read())
+    base = config["profiles"]["canada"]["topics"]
+    for i in range(max(size - len(base), 0)):
+        profile = config["profiles"].setdefault(f"profile_{i % profiles}", {"title": f"Profile {i % profiles}",
+                                                                            "topics": []})
+        profile["topics"].append({"id": f"topic_{i}", "title": f"Topic {i}", "prompt_ref": "CANADA_BASE_PROMPT",
+                                  "refresh_hours": 3 + i % 5})
+    return config
+
+
+def per_call_us(func, items: list, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="6,200,1000")
+    parser.add_argument("--profiles", type=int, default=4, help="profiles for the generated topics")
+    args = parser.parse_args()
+
+    import auto_update_real_engine
+    from prompt_utils import get_prompt_for_topic
+
+    with open(os.path.join(ROOT, "real-engine-data.json"), "rb") as f:
+        sample = codec.loads(f.read())["canada_labour"]
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    print(f"{'topics':>7} {'prompt us':>10} {'stale us/topic':>15} {'topic body us':>14} {'render ms':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        registry = topic_registry.TopicRegistry(build_config(size, args.profiles))
+        topic_registry._registry = registry
+        ids = registry.ids()
+        data = {topic_id: dict(sample, topic=topic_id) for topic_id in ids}
+        state = {topic_id: {"last_success": now} for topic_id in ids}
+        snapshot = Snapshot(data, encode_json(data), None)
+
+        prompt_us = per_call_us(get_prompt_for_topic, ids)
+        start = time.perf_counter()
+        auto_update_real_engine.stale_topics(state, data, ids)
+        stale_us = (time.perf_counter() - start) / len(ids) * 1e6
+        body_us = per_call_us(snapshot.projection, ids)
+        page = DashboardPage(sections=registry.dashboard_sections())
+        start = time.perf_counter()
+        page.get(snapshot)
+        render_ms = (time.perf_counter() - start) * 1000
+        print(f"{size:>7} {prompt_us:>10.3f} {stale_us:>15.3f} {body_us:>14.3f} {render_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
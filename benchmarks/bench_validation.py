@@ -0,0 +1,147 @@
+"""
+Canada REAL Engine - Validation Benchmark
+PURPOSE: Measures validation cost of the compiled schema validator against
+         the previous hand-written `validate_output`, and how many invalid
+         responses `repair_payload` recovers instead of falling back.
+
+The corpus is either a directory of recorded responses (one JSON object per
+file, with a "topic" key) or a synthetic one built from
+`real-engine-data.json` with common faults injected.
+
+Usage: python benchmarks/bench_validation.py [--corpus DIR] [--size 5000]
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from schemas import is_valid, repair_payload, validate_payload  # noqa: E402
+
+
+def legacy_validate_output(json_obj: dict) -> bool:
+    """The pre-schema validator, kept here as the baseline."""
+    def word_count(text: str) -> int:
+        return len(text.strip().split())
+    if not isinstance(json_obj, dict): return False
+    if not (isinstance(json_obj.get("headline"), str) and (isinstance(json_obj.get("summary"), str) or isinstance(json_obj.get("regional_content"), dict))): return False
+    if not (isinstance(json_obj.get("kpis"), list) and len(json_obj.get("kpis", [])) >= 3): return False
+    if json_obj.get("topic") in ["canada_immigration"] and json_obj.get("regional_content"):
+        regional_content = json_obj.get("regional_content", {})
+        required_regions = ["canada", "uk", "europe", "southeast-asia"]
+        if not all(region in regional_content for region in required_regions): return False
+        for region in required_regions:
+            if region in regional_content:
+                word_cnt = word_count(regional_content[region])
+                if word_cnt < 80 or word_cnt > 120: return False
+    relevance = json_obj.get("relevance", {})
+    if not (isinstance(relevance, dict) and isinstance(relevance.get("program_suggestions", []), list) and isinstance(relevance.get("target_students", ""), str)): return False
+    chart = json_obj.get("chart", {})
+    if not (isinstance(chart, dict) and isinstance(chart.get("chart_type", ""), str) and isinstance(chart.get("data_points", []), list)): return False
+    return True
+
+
+def _pad_regions(payload: dict) -> None:
+    regions = payload.get("regional_content")
+    if isinstance(regions, dict):
+        for region, text in regions.items():
+            words = (text.split() * 4)[:100]
+            regions[region] = " ".join(words)
+
+
+FAULTS = {
+    "none": lambda p: None,
+    "null_relevance": lambda p: p.__setitem__("relevance", None),
+    "numeric_strings": lambda p: [point.__setitem__("value", f"{point['value']:,}") for point in
+                                  p.get("chart", {}).get("data_points", []) if isinstance(point.get("value"), (int, float))],
+    "few_kpis": lambda p: p.__setitem__("kpis", p.get("kpis", [])[:2]),
+    "missing_headline": lambda p: p.pop("headline", None),
+    "summary_paragraphs": lambda p: p.__setitem__("summary", [p["summary"], p["summary"]]) if "summary" in p else None,
+}
+
+
+def synthetic_corpus(size: int, seed: int = 0) -> list:
+    with open(os.path.join(ROOT, "real-engine-data.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        topic_id = rng.choice(list(data))
+        payload = copy.deepcopy(data[topic_id])
+        payload["topic"] = topic_id
+        _pad_regions(payload)
+        fault = rng.choice(list(FAULTS))
+        FAULTS[fault](payload)
+        corpus.append(payload)
+    return corpus
+
+
+def load_corpus(directory: str) -> list:
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            corpus.append(json.load(f))
+    return corpus
+
+
+def time_per_item(func, corpus: list, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for payload in corpus:
+            func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark payload validation and repair")
+    parser.add_argument("--corpus", help="directory of recorded responses (*.json)")
+    parser.add_argument("--size", type=int, default=5000, help="synthetic corpus size")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.size)
+    print(f"corpus: {len(corpus)} payloads")
+
+    def safe_legacy(payload):
+        try:
+            return legacy_validate_output(payload)
+        except Exception:
+            return False
+
+    legacy_us = time_per_item(safe_legacy, corpus)
+    compiled_us = time_per_item(lambda p: is_valid(p, p.get("topic")), corpus)
+    detailed_us = time_per_item(lambda p: validate_payload(p, p.get("topic")), corpus)
+    print(f"legacy validate_output : {legacy_us:7.2f} us/payload")
+    print(f"compiled is_valid      : {compiled_us:7.2f} us/payload")
+    print(f"compiled with errors   : {detailed_us:7.2f} us/payload")
+
+    legacy_ok = sum(1 for p in corpus if safe_legacy(p))
+    recovered, reasons = 0, Counter()
+    for payload in corpus:
+        payload = copy.deepcopy(payload)
+        if is_valid(payload, payload.get("topic")):
+            continue
+        repair_payload(payload, payload.get("topic"))
+        errors = validate_payload(payload, payload.get("topic"))
+        if errors:
+            reasons.update(error.split(":")[0] for error in errors)
+        else:
+            recovered += 1
+    invalid = len(corpus) - legacy_ok
+    print(f"valid as received      : {legacy_ok}/{len(corpus)}")
+    print(f"recovered by repair    : {recovered}/{invalid}")
+    print(f"still falling back     : {invalid - recovered}/{len(corpus)} ({100 * (invalid - recovered) / len(corpus):.1f}%)")
+    for path, count in reasons.most_common(5):
+        print(f"  {count:6d}  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Canada REAL Engine - HTTP Load Test
+PURPOSE: Measures p50/p99 latency and throughput of `/` and `/data` over
+         real sockets at increasing concurrency. Each client thread keeps
+         one keep-alive connection open and sends requests back to back
+         for a fixed duration.
+
+         By default it starts the app in a subprocess: gunicorn with
+         gunicorn.conf.py if gunicorn is installed, otherwise the Flask
+         development server (`--server dev`, for comparison). Pass `--url`
+         to load an already running server instead.
+
+Usage: python benchmarks/load_test.py [--server gunicorn|dev] [--url http://host:port]
+                                       [--levels 1,4,16,64,256] [--duration 5]
+"""
+import argparse
+import http.client
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ("/", "/data")
+
+
+def start_server(kind: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(port), REAL_ENGINE_EMBEDDED_SCHEDULER="0")
+    if kind == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "app:app"]
+    else:
+        cmd = [sys.executable, "app.py"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/healthz")
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit(f"{kind} server exited with status {proc.returncode}")
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"{kind} server did not become ready on port {port}")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_level(host: str, port: int, path: str, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    stop_at = [0.0]
+
+    def client():
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        local = []
+        local_errors = 0
+        start_barrier.wait()
+        while time.perf_counter() < stop_at[0]:
+            t0 = time.perf_counter()
+            try:
+                conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    local_errors += 1
+                if response.getheader("Connection", "").lower() == "close":
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                continue
+            local.append(time.perf_counter() - t0)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    stop_at[0] = time.perf_counter() + duration
+    start_barrier.wait()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_server = "gunicorn" if importlib.util.find_spec("gunicorn") else "dev"
+    parser.add_argument("--server", choices=("gunicorn", "dev"), default=default_server)
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--levels", default="1,4,16,64,256")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per path and level")
+    args = parser.parse_args()
+
+    proc = None
+    if args.url:
+        parsed = urllib.parse.urlparse(args.url)
+        host, port, label = parsed.hostname, parsed.port or 80, args.url
+    else:
+        host, port, label = "127.0.0.1", args.port, f"{args.server} (local)"
+        proc = start_server(args.server, port)
+
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    try:
+        print(f"Load test against {label}, {args.duration:g}s per path and level")
+        print(f"{'path':<7} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for path in PATHS:
+            for concurrency in levels:
+                r = run_level(host, port, path, concurrency, args.duration)
+                print(f"{r['path']:<7} {r['concurrency']:>5} {r['rps']:>9.0f} "
+                      f"{r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Canada REAL Engine - Benchmark Suite
+PURPOSE: Runs the serving, payload and generation benchmarks in one go and
+         writes the numbers as JSON, so runs on different commits can be
+         compared. Built on the helpers of the individual bench_*.py
+         scripts, the local Perplexity stub and load_test.py.
+
+         serving    - `/` and `/data` via the Flask test client, and over a
+                      real socket (server started in a subprocess).
+         payloads   - schema validation per payload, and JSON parse /
+                      serialize cost (stdlib and codec.py) for documents
+                      scaled from `real-engine-data.json` (x1, x10, x100
+                      topics).
+         generation - `auto_update_real_engine.main()` cycle time against the
+                      stub with configurable latency and error rate.
+
+Usage: python benchmarks/run_suite.py [--only serving,payloads,generation] [--quick]
+                                      [--latency 0.2] [--error-rate 0.1]
+                                      [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+os.chdir(ROOT)
+
+from bench_generation import run_cycle  # noqa: E402  (also disables the response cache)
+from bench_validation import synthetic_corpus, time_per_item  # noqa: E402
+from load_test import percentile, run_level, start_server  # noqa: E402
+from stub_perplexity import start_stub_server  # noqa: E402
+
+SECTIONS = ("serving", "payloads", "generation")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+# Metrics named like this are better when higher; everything else (ms, us, s) when lower.
+HIGHER_IS_BETTER = ("rps", "per_s")
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def client_latencies(client, path: str, n: int) -> dict:
+    client.get(path)  # warm up: first request loads the snapshot / renders the page
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(n):
+        t0 = time.perf_counter()
+        client.get(path, headers={"Accept-Encoding": "gzip"})
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {"rps": round(n / elapsed, 1), "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 4)}
+
+
+def bench_serving(args) -> dict:
+    from app import app
+
+    client = app.test_client()
+    results = {"test_client": {path: client_latencies(client, path, args.requests) for path in ("/", "/data")}}
+    if args.no_socket:
+        return results
+    proc = start_server(args.server, args.port)
+    try:
+        socket_results = {}
+        for path in ("/", "/data"):
+            for concurrency in args.socket_levels:
+                r = run_level("127.0.0.1", args.port, path, concurrency, args.duration)
+                socket_results[f"{path} c{concurrency}"] = {
+                    "rps": round(r["rps"], 1), "p50_ms": round(r["p50_ms"], 3),
+                    "p99_ms": round(r["p99_ms"], 3), "errors": r["errors"],
+                }
+        results["socket"] = {"server": args.server, "levels": socket_results}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return results
+
+
+def scaled_document(data: dict, factor: int) -> dict:
+    return {f"{topic_id}_{i}": payload for i in range(factor) for topic_id, payload in data.items()}
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_payloads(args) -> dict:
+    import codec
+    from schemas import is_valid, validate_payload
+
+    corpus = synthetic_corpus(args.corpus_size)
+    results = {
+        "validation": {
+            "corpus_size": len(corpus),
+            "is_valid_us": round(time_per_item(lambda p: is_valid(p, p.get("topic")), corpus), 3),
+            "validate_payload_us": round(time_per_item(lambda p: validate_payload(p, p.get("topic")), corpus), 3),
+        },
+        "json": {"codec_backend": codec.BACKEND},
+    }
+    with open(os.path.join(ROOT, "real-engine-data.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for factor in (1, 10, 100):
+        document = scaled_document(data, factor)
+        compact = json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+        repeat = max(3, args.repeat // factor)
+        results["json"][f"x{factor}"] = {
+            "bytes": len(compact.encode("utf-8")),
+            "dumps_ms": round(best_of(lambda: json.dumps(document, ensure_ascii=False, separators=(",", ":")),
+                                      repeat) * 1000, 4),
+            "dumps_indent_ms": round(best_of(lambda: json.dumps(document, indent=2), repeat) * 1000, 4),
+            "loads_ms": round(best_of(lambda: json.loads(compact), repeat) * 1000, 4),
+            "codec_dumps_ms": round(best_of(lambda: codec.dumps(document), repeat) * 1000, 4),
+            "codec_loads_ms": round(best_of(lambda: codec.loads(compact), repeat) * 1000, 4),
+        }
+    return results
+
+
+def bench_generation(args) -> dict:
+    import prompt_utils
+    from perplexity_client import get_default_client
+
+    server = start_stub_server(latency=args.latency, error_rate=args.error_rate)
+    prompt_utils.PERPLEXITY_API_URL = server.url
+    os.environ["PERPLEXITY_API_URL"] = server.url
+    results = {"stub_latency_s": args.latency, "stub_error_rate": args.error_rate}
+    try:
+        modes = ("concurrent",) if args.skip_sequential else ("sequential", "concurrent")
+        for mode in modes:
+            client = get_default_client(server.url)
+            client.stats.clear()
+            requests_before = server.request_count
+            elapsed, data = run_cycle(concurrent=mode == "concurrent")
+            stats = client.summary()
+            results[mode] = {
+                "cycle_s": round(elapsed, 3),
+                "topics": len(data),
+                "fallbacks": sum(1 for payload in data.values() if payload.get("source") == "Canada REAL Engine"),
+                "http_requests": server.request_count - requests_before,
+                "retries": stats["retries"],
+            }
+    finally:
+        server.shutdown()
+    return results
+
+
+def flatten(tree: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in tree.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Prints old/new per metric; returns how many regressed by more than `threshold`."""
+    old, new = flatten(baseline.get("results", {})), flatten(current["results"])
+    regressions = 0
+    print(f"\nCompared with {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')}):")
+    for name in sorted(set(old) & set(new)):
+        before, after = old[name], new[name]
+        if not before or name.endswith(("bytes", "topics", "corpus_size", "latency_s", "error_rate")):
+            continue
+        change = (after - before) / before
+        worse = -change if name.rsplit(".", 1)[-1].startswith(HIGHER_IS_BETTER) else change
+        flag = ""
+        if worse > threshold:
+            flag = "  <-- regression"
+            regressions += 1
+        print(f"  {name:<55} {before:>12g} -> {after:<12g} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=",".join(SECTIONS), help="comma-separated sections to run")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--requests", type=int, default=2000, help="test-client requests per path")
+    parser.add_argument("--server", choices=("gunicorn", "dev"), default=None, help="socket server (default: auto)")
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--socket-levels", default="1,16,64")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per socket level")
+    parser.add_argument("--no-socket", action="store_true", help="skip the real-socket measurements")
+    parser.add_argument("--corpus-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="fraction of stub requests answered 503")
+    parser.add_argument("--skip-sequential", action="store_true")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold for --compare")
+    args = parser.parse_args()
+
+    if args.server is None:
+        import importlib.util
+        args.server = "gunicorn" if importlib.util.find_spec("gunicorn") else "dev"
+    if args.quick:
+        args.requests, args.corpus_size, args.repeat, args.duration = 300, 1000, 10, 1.0
+    args.socket_levels = [int(level) for level in args.socket_levels.split(",") if level.strip()]
+    sections = [section.strip() for section in args.only.split(",") if section.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(sorted(unknown))}")
+
+    runners = {"serving": bench_serving, "payloads": bench_payloads, "generation": bench_generation}
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": {},
+    }
+    for section in sections:
+        print(f"Running {section} benchmarks...")
+        start = time.perf_counter()
+        report["results"][section] = runners[section](args)
+        print(f"  done in {time.perf_counter() - start:.1f}s")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Canada REAL Engine - Startup Profile
+PURPOSE: Measures how long a fresh interpreter takes to import the web app
+         (`app.py`) and the generator (`auto_update_real_engine.py`), and
+         their peak RSS. Also lists the slowest imports, like
+         `python -X importtime`, and checks that the web entry point loads
+         no generation code (prompt_utils, the API client, requests,
+         pandas).
+
+         With `--check`, it exits non-zero when a target goes over its
+         cold-start or RSS budget or the web app imports generation code.
+         Use it as the startup regression check in CI or before a deploy.
+
+Usage: python benchmarks/startup_profile.py [--target web,generator] [--runs 5] [--top 15]
+       python benchmarks/startup_profile.py --check [--budget-ms 1500] [--rss-budget-mb 150]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import codec  # noqa: E402
+
+TARGETS = {"web": "app", "generator": "auto_update_real_engine"}
+# Modules the web entry point must never import.
+WEB_FORBIDDEN = ("prompt_utils", "perplexity_client", "auto_update_real_engine", "requests", "pandas")
+BUDGET_MS = float(os.environ.get("REAL_ENGINE_STARTUP_BUDGET_MS", "1500"))
+RSS_BUDGET_MB = float(os.environ.get("REAL_ENGINE_RSS_BUDGET_MB", "150"))
+
+# Runs in the child interpreter; prints one JSON line after the import.
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+import_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"import_ms": import_ms, "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  "modules": sorted(sys.modules)}}))
+"""
+
+
+def run_child(module: str, importtime: bool = False) -> tuple:
+    """Imports `module` in a fresh interpreter. Returns (report, wall ms, stderr)."""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD.format(module=module)]
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr}")
+    report = codec.loads(proc.stdout.strip().splitlines()[-1])
+    return report, wall_ms, proc.stderr
+
+
+def slowest_imports(importtime_output: str, top: int) -> list:
+    """[(cumulative ms, self ms, module)] from `-X importtime` output, slowest first."""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def profile(target: str, runs: int, top: int) -> dict:
+    module = TARGETS[target]
+    reports = [run_child(module) for _ in range(runs)]
+    _, _, importtime_output = run_child(module, importtime=True)
+    modules = set(reports[0][0]["modules"])
+    return {
+        "target": target,
+        "module": module,
+        "cold_start_ms": statistics.median(wall for _, wall, _ in reports),
+        "import_ms": statistics.median(report["import_ms"] for report, _, _ in reports),
+        # Linux reports ru_maxrss in kB.
+        "peak_rss_mb": max(report["peak_rss_kb"] for report, _, _ in reports) / 1024,
+        "module_count": len(modules),
+        "forbidden": [name for name in WEB_FORBIDDEN if name in modules] if target == "web" else [],
+        "slowest": slowest_imports(importtime_output, top),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="web,generator", help="comma-separated: web, generator")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per target (median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a budget is exceeded")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="cold-start budget per target")
+    parser.add_argument("--rss-budget-mb", type=float, default=RSS_BUDGET_MB, help="peak RSS budget per target")
+    args = parser.parse_args()
+    targets = [target.strip() for target in args.target.split(",") if target.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    failures = []
+    for target in targets:
+        result = profile(target, args.runs, args.top)
+        print(f"\n{target} ({result['module']}): cold start {result['cold_start_ms']:.0f} ms "
+              f"(import {result['import_ms']:.0f} ms), peak RSS {result['peak_rss_mb']:.1f} MB, "
+              f"{result['module_count']} modules")
+        print(f"  {'cumulative ms':>13} {'self ms':>8}  module")
+        for cumulative_ms, self_ms, name in result["slowest"]:
+            print(f"  {cumulative_ms:>13.1f} {self_ms:>8.1f}  {name}")
+        if result["cold_start_ms"] > args.budget_ms:
+            failures.append(f"{target}: cold start {result['cold_start_ms']:.0f} ms > {args.budget_ms:.0f} ms")
+        if result["peak_rss_mb"] > args.rss_budget_mb:
+            failures.append(f"{target}: peak RSS {result['peak_rss_mb']:.1f} MB > {args.rss_budget_mb:.0f} MB")
+        if result["forbidden"]:
+            failures.append(f"{target}: imports generation code: {', '.join(result['forbidden'])}")
+
+    if failures:
+        print("\n❌ Startup budget exceeded:\n  " + "\n  ".join(failures))
+        if args.check:
+            sys.exit(1)
+    else:
+        print(f"\n✅ Within budget ({args.budget_ms:.0f} ms, {args.rss_budget_mb:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Canada REAL Engine - Local Perplexity Stub
+PURPOSE: A tiny threaded HTTP server that mimics the Perplexity
+         `/chat/completions` endpoint. It answers each topic prompt with a
+         valid payload derived from `real-engine-data.json`, after a
+         configurable delay, so generation cycles can be timed offline.
+         Batched prompts (see `get_batch_prompt`) get a keyed object with
+         one payload per requested topic.
+
+Usage: python benchmarks/stub_perplexity.py --port 8765 --latency 2.0
+       PERPLEXITY_API_URL=http://127.0.0.1:8765/chat/completions python auto_update_real_engine.py
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from prompt_utils import RESOURCE_ROTATION_HEADING, get_prompt_for_topic  # noqa: E402
+
+
+def load_topic_payloads() -> dict:
+    with open(os.path.join(ROOT, "real-engine-data.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    payloads = {}
+    for topic_id, payload in data.items():
+        payload = dict(payload)
+        payload.setdefault("relevance", {"program_suggestions": [], "target_students": ""})
+        if isinstance(payload.get("regional_content"), dict):
+            # validate_output wants 80-120 words per region; pad the sample text.
+            padded = {}
+            for region, text in payload["regional_content"].items():
+                words = text.split()
+                while len(words) < 90:
+                    words += text.split()
+                padded[region] = " ".join(words[:100])
+            payload["regional_content"] = padded
+        payloads[topic_id] = payload
+    return payloads
+
+
+class StubPerplexityServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, error_rate: float = 0.0, truncate_at: int = 0,
+                 per_topic_latency: float = 0.0, batch_omit_rate: float = 0.0):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        # Generation time per answered topic, on top of `latency` (a batched answer is longer to write).
+        self.per_topic_latency = per_topic_latency
+        self.error_rate = error_rate
+        # Fraction of topics silently left out of batched answers.
+        self.batch_omit_rate = batch_omit_rate
+        # Streamed answers stop after this many characters with finish_reason "length" (0 = never).
+        self.truncate_at = truncate_at
+        self.payloads = load_topic_payloads()
+        self.prompt_to_topic = {get_prompt_for_topic(t).partition(RESOURCE_ROTATION_HEADING)[0]: t
+                                for t in self.payloads}
+        self.request_count = 0
+        self._counter_lock = threading.Lock()
+        self._rng = random.Random(0)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/chat/completions"
+
+    def should_fail(self) -> bool:
+        with self._counter_lock:
+            self.request_count += 1
+            return self._rng.random() < self.error_rate
+
+    def omit_from_batch(self) -> bool:
+        with self._counter_lock:
+            return self._rng.random() < self.batch_omit_rate
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        fail = self.server.should_fail()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = body.get("messages", [{}])
+        user_prompts = [m.get("content", "") for m in messages if m.get("role") == "user"]
+        prompt = user_prompts[0] if user_prompts else ""
+        # The generator appends the topic's recent sources (RESOURCE_MAP) to its prompt.
+        topic_id = self.server.prompt_to_topic.get(prompt.partition(RESOURCE_ROTATION_HEADING)[0])
+        batch = [] if topic_id else [t for t in self.server.payloads if f"### {t}\n" in prompt]
+        if batch:
+            payload = {t: self.server.payloads[t] for t in batch if not self.server.omit_from_batch()}
+        else:
+            payload = self.server.payloads.get(topic_id) or next(iter(self.server.payloads.values()))
+        time.sleep(self.server.latency + self.server.per_topic_latency * max(len(batch), 1))
+        if fail:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        content = "Here is the analysis:\n" + json.dumps(payload) + "\n\nLet me know if you need anything else."
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        if body.get("stream"):
+            self.send_stream(content, messages, prompt_tokens)
+            return
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                 "total_tokens": prompt_tokens + len(content) // 4}
+        out = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}],
+                          "usage": usage}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+
+    def send_stream(self, content: str, messages: list, prompt_tokens: int = 0):
+        # A resume request carries the partial answer; continue right after it.
+        already_sent = "".join(m.get("content", "") for m in messages if m.get("role") == "assistant")
+        content = content[len(already_sent):]
+        finish_reason = "stop"
+        if self.server.truncate_at and not already_sent and len(content) > self.server.truncate_at:
+            content, finish_reason = content[:self.server.truncate_at], "length"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        try:
+            for start in range(0, len(content), 64):
+                last = start + 64 >= len(content)
+                # Like the real API, every chunk carries the running token usage.
+                completion_tokens = min(start + 64, len(content)) // 4
+                event = {"choices": [{"delta": {"content": content[start:start + 64]},
+                                      "finish_reason": finish_reason if last else None}],
+                         "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                   "total_tokens": prompt_tokens + completion_tokens}}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading once its JSON object closed
+
+
+def start_stub_server(latency: float = 0.0, error_rate: float = 0.0, port: int = 0,
+                      truncate_at: int = 0, per_topic_latency: float = 0.0,
+                      batch_omit_rate: float = 0.0) -> StubPerplexityServer:
+    """Starts the stub on a background thread and returns it; call `shutdown()` when done."""
+    server = StubPerplexityServer(("127.0.0.1", port), latency=latency, error_rate=error_rate,
+                                  truncate_at=truncate_at, per_topic_latency=per_topic_latency,
+                                  batch_omit_rate=batch_omit_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Perplexity API stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds to wait before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--truncate-at", type=int, default=0, help="cut streamed answers after N characters")
+    parser.add_argument("--per-topic-latency", type=float, default=0.0, help="extra seconds per answered topic")
+    parser.add_argument("--batch-omit-rate", type=float, default=0.0, help="fraction of topics left out of batches")
+    args = parser.parse_args()
+    server = StubPerplexityServer(("127.0.0.1", args.port), latency=args.latency, error_rate=args.error_rate,
+                                  truncate_at=args.truncate_at, per_topic_latency=args.per_topic_latency,
+                                  batch_omit_rate=args.batch_omit_rate)
+    print(f"Stub Perplexity API listening on {server.url}")
+    server.serve_forever()
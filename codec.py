@@ -0,0 +1,87 @@
+"""
+Canada REAL Engine - JSON Codec
+PURPOSE: One place that encodes and decodes JSON for the whole engine.
+         It uses orjson (or msgspec) when installed and falls back to the
+         standard library otherwise, so behaviour is the same either way:
+         UTF-8 bytes out, compact by default, `pretty=True` for two-space
+         indentation. Decode errors are ValueError subclasses under every
+         backend.
+
+         `REAL_ENGINE_JSON_CODEC` forces a backend (`orjson`, `msgspec`,
+         `stdlib`); the default picks the fastest one installed.
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional dependency
+    msgspec = None
+
+_REQUESTED = os.environ.get("REAL_ENGINE_JSON_CODEC", "auto").lower()
+
+
+def _pick_backend() -> str:
+    available = {"orjson": orjson is not None, "msgspec": msgspec is not None, "stdlib": True}
+    if _REQUESTED in available:
+        if available[_REQUESTED]:
+            return _REQUESTED
+        print(f"⚠️ JSON codec '{_REQUESTED}' is not installed; falling back to the fastest available one.")
+    return next(name for name in ("orjson", "msgspec", "stdlib") if available[name])
+
+
+BACKEND = _pick_backend()
+
+
+def _stdlib_dumps(obj, pretty: bool, sort_keys: bool, default) -> bytes:
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys, default=default)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=default)
+    return text.encode("utf-8")
+
+
+def dumps(obj, pretty: bool = False, sort_keys: bool = False, default=None) -> bytes:
+    """Encodes `obj` as UTF-8 JSON bytes (compact unless `pretty`)."""
+    if BACKEND == "orjson":
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the stdlib encoder handles
+            return _stdlib_dumps(obj, pretty, sort_keys, default)
+    if BACKEND == "msgspec" and not sort_keys:
+        try:
+            body = msgspec.json.encode(obj, enc_hook=default)
+        except (TypeError, msgspec.EncodeError):
+            return _stdlib_dumps(obj, pretty, sort_keys, default)
+        return msgspec.json.format(body, indent=2) if pretty else body
+    return _stdlib_dumps(obj, pretty, sort_keys, default)
+
+
+def dumps_str(obj, pretty: bool = False, sort_keys: bool = False, default=None) -> str:
+    return dumps(obj, pretty=pretty, sort_keys=sort_keys, default=default).decode("utf-8")
+
+
+def loads(data):
+    """Decodes JSON from bytes, a buffer (e.g. a memoryview) or str. Raises ValueError on malformed input."""
+    if isinstance(data, memoryview) and BACKEND != "msgspec":
+        # orjson and json.loads only take str / bytes / bytearray.
+        data = data.tobytes()
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    if BACKEND == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+    return json.loads(data)
@@ -0,0 +1,76 @@
+"""
+Canada REAL Engine - Precompressed Response Variants
+PURPOSE: Builds gzip (and brotli, when the `brotli` package is installed)
+         encodings of a response body once, and picks the best variant for
+         a request's `Accept-Encoding` header. Nothing is compressed per
+         request.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip alone is still a large win
+    brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# For bodies compressed per request (not memoized): far cheaper, still most of the size win.
+GZIP_FAST_LEVEL = 1
+BROTLI_FAST_QUALITY = 1
+# Bodies smaller than this are not worth the Content-Encoding overhead.
+MIN_COMPRESS_SIZE = 256
+
+# Server preference when the client rates several encodings equally.
+_PREFERENCE = ("br", "gzip", "identity")
+
+
+def build_variants(body: bytes, fast: bool = False) -> dict:
+    """Returns {"identity": body, "gzip": ..., "br": ...}, keeping only variants that are smaller.
+
+    `fast` uses the cheapest levels, for bodies that are built per request.
+    """
+    variants = {"identity": body}
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+    gz = gzip.compress(body, compresslevel=GZIP_FAST_LEVEL if fast else GZIP_LEVEL, mtime=0)
+    if len(gz) < len(body):
+        variants["gzip"] = gz
+    if brotli is not None:
+        br = brotli.compress(body, quality=BROTLI_FAST_QUALITY if fast else BROTLI_QUALITY)
+        if len(br) < len(body):
+            variants["br"] = br
+    return variants
+
+
+def _parse_accept_encoding(header: str) -> dict:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, variants: dict) -> str:
+    """Picks the variant key to serve for an `Accept-Encoding` header value."""
+    if not accept_encoding or len(variants) == 1:
+        return "identity"
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*")
+    best, best_q = "identity", 0.0
+    for name in _PREFERENCE:
+        if name not in variants or name == "identity":
+            continue
+        q = accepted.get(name, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = name, q
+    return best
@@ -0,0 +1,90 @@
+"""
+Canada REAL Engine - Pre-rendered Dashboard Page
+PURPOSE: Compiles `templates/dashboard.html` once and keeps the rendered
+         page (and its compressed variants) in memory as bytes. The page is
+         re-rendered only when the template file changes or, in inline
+         mode, when the data snapshot changes. The topic panels come from
+         the topic registry (`sections`), passed in at construction.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import jinja2
+
+import codec
+from compression import build_variants
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "dashboard.html")
+DEFAULT_CHECK_INTERVAL = float(os.environ.get("TEMPLATE_CHECK_INTERVAL", "2.0"))
+# Embeds the current data snapshot in the page so first paint needs no /data request.
+INLINE_DATA = os.environ.get("DASHBOARD_INLINE_DATA", "0") == "1"
+
+
+class RenderedPage:
+    __slots__ = ("body", "etag", "variants", "key")
+
+    def __init__(self, body: bytes, key: tuple):
+        self.body = body
+        self.key = key
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = build_variants(body)
+
+
+def _script_safe_json(data) -> str:
+    # "</" would let the payload close the <script> element early.
+    return codec.dumps_str(data).replace("</", "<\\/")
+
+
+class DashboardPage:
+    """Rendered dashboard cache. `get()` is a memory lookup between checks."""
+
+    def __init__(self, template_path: str = TEMPLATE_PATH, inline_data: bool = INLINE_DATA,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL, sections: list = (), live_updates: bool = True):
+        self.template_path = template_path
+        # [{"id", "title", "layout", "profile", "profile_title"}, ...] in display order.
+        self.sections_json = _script_safe_json(list(sections))
+        # False when the server has /events disabled; the page then polls /data.
+        self.live_updates = live_updates
+        self.inline_data = inline_data
+        self.check_interval = check_interval
+        self._template = None
+        self._template_signature = None
+        self._page = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, snapshot=None) -> RenderedPage:
+        """Returns the current page; pass the current snapshot in inline mode."""
+        page = self._page
+        if page is not None and time.monotonic() < self._next_check:
+            if not self.inline_data or snapshot is None or page.key[1] == snapshot.etag:
+                return page
+        with self._lock:
+            return self._refresh(snapshot)
+
+    def _load_template(self) -> None:
+        if time.monotonic() < self._next_check and self._template is not None:
+            return
+        self._next_check = time.monotonic() + self.check_interval
+        st = os.stat(self.template_path)
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if signature == self._template_signature:
+            return
+        with open(self.template_path, "r", encoding="utf-8") as f:
+            self._template = jinja2.Template(f.read())
+        self._template_signature = signature
+        print(f"🖼️ Compiled Canada dashboard template from: {self.template_path}")
+
+    def _refresh(self, snapshot) -> RenderedPage:
+        self._load_template()
+        data_etag = snapshot.etag if (self.inline_data and snapshot is not None) else None
+        key = (self._template_signature, data_etag)
+        if self._page is not None and self._page.key == key:
+            return self._page
+        inline = _script_safe_json(snapshot.data) if data_etag else None
+        body = self._template.render(inline_data=inline, sections_json=self.sections_json,
+                                     live_updates=self.live_updates).encode("utf-8")
+        self._page = RenderedPage(body, key)
+        return self._page
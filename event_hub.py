@@ -0,0 +1,146 @@
+"""
+Canada REAL Engine - Snapshot Change Events (Server-Sent Events)
+PURPOSE: One notifier thread per process watches the snapshot cache and,
+         when a new snapshot appears, formats a single small event naming
+         the topics whose ETag changed. Every connected `/events` client
+         is woken and sent the same pre-formatted bytes, so idle clients
+         cost a blocked greenlet (under gunicorn's gevent worker, the
+         default in gunicorn.conf.py) and no per-client polling or encoding.
+
+         Under a thread-per-connection server (gunicorn's `gthread` worker,
+         Flask's dev server) every open stream holds a thread, so streams
+         are capped per process (`EVENTS_MAX_STREAMS`). Clients turned away
+         with 503 fall back to polling `/data`.
+"""
+import os
+import threading
+
+import codec
+
+POLL_INTERVAL = float(os.environ.get("EVENTS_POLL_INTERVAL", "2.0"))
+HEARTBEAT_SECONDS = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Browsers reconnect after this many milliseconds if the stream drops.
+RETRY_MS = int(os.environ.get("EVENTS_RETRY_MS", "5000"))
+# Open /events streams per process; 0 disables /events. gunicorn.conf.py sets it from the worker class.
+MAX_STREAMS = int(os.environ.get("EVENTS_MAX_STREAMS", "2"))
+
+
+def format_event(event: str, data: dict, event_id: int = None) -> bytes:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {codec.dumps_str(data)}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class SnapshotEventHub:
+    def __init__(self, snapshot_cache, poll_interval: float = POLL_INTERVAL,
+                 heartbeat_seconds: float = HEARTBEAT_SECONDS, max_streams: int = MAX_STREAMS):
+        self.snapshot_cache = snapshot_cache
+        self.max_streams = max_streams
+        self.poll_interval = poll_interval
+        self.heartbeat_seconds = heartbeat_seconds
+        self._cond = threading.Condition()
+        self._version = 0
+        self._message = None
+        self._topic_etags = {}
+        self._last_snapshot = None
+        self._subscribers = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def start(self) -> "SnapshotEventHub":
+        with self._start_lock:
+            if self._thread is None:
+                self._check()
+                self._thread = threading.Thread(target=self._loop, name="real-engine-events", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self._check()
+
+    def _check(self) -> None:
+        try:
+            snapshot = self.snapshot_cache.get()
+        except (FileNotFoundError, ValueError):
+            return
+        # Snapshots are immutable, so the same object means nothing changed.
+        if snapshot is self._last_snapshot:
+            return
+        self._last_snapshot = snapshot
+        topic_etags = {topic_id: encoded.etag for topic_id, encoded in snapshot.topics.items()}
+        if topic_etags == self._topic_etags:
+            return
+        changed = [topic_id for topic_id, etag in topic_etags.items() if self._topic_etags.get(topic_id) != etag]
+        removed = [topic_id for topic_id in self._topic_etags if topic_id not in topic_etags]
+        with self._cond:
+            first = not self._topic_etags
+            self._topic_etags = topic_etags
+            self._version += 1
+            self._message = format_event("snapshot", {
+                "etag": snapshot.etag, "topics": topic_etags, "changed": [] if first else changed, "removed": removed,
+            }, self._version)
+            self._cond.notify_all()
+
+    def open_stream(self):
+        """SSE body for one client (the current state, then changes and heartbeats).
+
+        Returns None when `max_streams` streams are already open in this process.
+        Starts the notifier first, so even the first client's hello lists the topics.
+        """
+        if self.max_streams <= 0:
+            return None
+        self.start()
+        with self._cond:
+            if self._subscribers >= self.max_streams:
+                return None
+            self._subscribers += 1
+            seen = self._version
+            hello = format_event("hello", {"topics": self._topic_etags}, seen)
+        return _Stream(self, self._events(seen, hello))
+
+    def _events(self, seen: int, hello: bytes):
+        yield f"retry: {RETRY_MS}\n\n".encode("utf-8") + hello
+        while not self._stop.is_set():
+            with self._cond:
+                self._cond.wait_for(lambda: self._version != seen or self._stop.is_set(),
+                                    timeout=self.heartbeat_seconds)
+                message = self._message if self._version != seen else None
+                seen = self._version
+            # Comment lines keep proxies from closing an idle connection.
+            yield message if message is not None else b": keep-alive\n\n"
+
+    def _release(self) -> None:
+        with self._cond:
+            self._subscribers -= 1
+
+
+class _Stream:
+    """Response body of one /events client. The WSGI server calls `close()` when the
+    client goes away, even if the body was never iterated, which frees the slot."""
+    __slots__ = ("_hub", "_events", "_closed")
+
+    def __init__(self, hub: SnapshotEventHub, events):
+        self._hub = hub
+        self._events = events
+        self._closed = False
+
+    def __iter__(self):
+        return self._events
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._events.close()
+            self._hub._release()
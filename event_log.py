@@ -0,0 +1,38 @@
+"""
+Canada REAL Engine - Structured Event Log
+PURPOSE: JSON-lines logging for hot paths. `log_event` formats one line
+         and hands it to a queue; a single background listener thread does
+         the (blocking) write to stderr, so request threads never wait on
+         the stream. High-volume events pass a `sample` rate so only a
+         fraction of them are logged at all.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+# Fraction of per-request events that are logged.
+REQUEST_LOG_SAMPLE = float(os.environ.get("REAL_ENGINE_REQUEST_LOG_SAMPLE", "0.01"))
+
+_queue = queue.SimpleQueue()
+_listener = logging.handlers.QueueListener(_queue, logging.StreamHandler(sys.stderr))
+_listener.start()
+atexit.register(_listener.stop)
+
+logger = logging.getLogger("real_engine.events")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_queue))
+logger.propagate = False
+
+
+def log_event(event: str, sample: float = 1.0, level: int = logging.INFO, **fields) -> None:
+    """Logs `{"ts", "event", **fields}` as one JSON line, for a `sample` fraction of calls."""
+    if sample < 1.0 and random.random() >= sample:
+        return
+    fields = {"ts": round(time.time(), 3), "event": event, "level": logging.getLevelName(level), **fields}
+    logger.log(level, json.dumps(fields, ensure_ascii=False, default=str))
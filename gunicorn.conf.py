@@ -0,0 +1,62 @@
+"""
+Canada REAL Engine - Production Server Configuration (gunicorn)
+PURPOSE: Replaces Flask's development server (`python app.py`) in
+         deployment. gunicorn loads this file automatically from the
+         working directory:
+
+             gunicorn app:app
+
+         Workers are separate processes, each with its own in-memory
+         snapshot. A new data file is swapped in by every worker on its
+         next check (see snapshot_cache.py), and in-flight requests finish
+         on the snapshot they started with, so publishing data never needs
+         a restart. `kill -HUP <master pid>` gracefully replaces workers
+         after a code or template deploy.
+"""
+import importlib.util
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+
+# "gevent" (in requirements.txt) parks each idle /events stream as a greenlet, so thousands of live
+# clients hold no threads. Without gevent installed the default falls back to "gthread".
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS",
+                              "gevent" if importlib.util.find_spec("gevent") is not None else "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "2000"))
+
+# Each /events stream holds a thread under gthread: let streams take at most a quarter of
+# them, so /, /data and /healthz always have threads left (clients past the cap poll /data).
+# An idle stream is only a parked greenlet under gevent.
+if worker_class == "gevent":
+    os.environ.setdefault("EVENTS_MAX_STREAMS", str(worker_connections // 2))
+else:
+    os.environ.setdefault("EVENTS_MAX_STREAMS", str(threads // 4))
+
+# Keep-alive: hold idle client (or load balancer) connections open long enough
+# to be reused. It must exceed the proxy's idle timeout, or the proxy may send
+# on a socket gunicorn just closed.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "75"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# Recycle workers now and then; jitter keeps them from restarting together.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    """Load the snapshot and render the page before the worker takes traffic."""
+    import app
+
+    try:
+        snapshot = app.snapshot_cache.get()
+    except (FileNotFoundError, ValueError):
+        snapshot = None
+    app.dashboard_page.get(snapshot)
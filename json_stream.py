@@ -0,0 +1,68 @@
+"""
+Canada REAL Engine - Incremental JSON Extraction
+PURPOSE: Finds the first top-level JSON object in text that arrives in
+         pieces (e.g. a streamed completion), so the caller can stop
+         reading the moment the object closes, and can tell a response
+         that was cut off mid-object from one that never contained JSON.
+"""
+
+
+class IncrementalJSONExtractor:
+    """Feed text chunks; `complete` becomes True once the first `{...}` object closes.
+
+    Braces inside JSON strings (and escaped quotes) are handled, so prose
+    before the object and anything after it are ignored.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.complete = False
+        self.text = ""
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    @property
+    def partial(self) -> str:
+        """The object text received so far (useful for resuming a truncated answer)."""
+        return "".join(self._buffer)
+
+    def feed(self, chunk: str) -> bool:
+        """Consumes `chunk`; returns True once the object is complete."""
+        if self.complete:
+            return True
+        start = 0
+        if not self._started:
+            start = chunk.find("{")
+            if start == -1:
+                return False
+            self._started = True
+        depth, in_string, escape = self._depth, self._in_string, self._escape
+        for index in range(start, len(chunk)):
+            char = chunk[index]
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == "\\":
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    self._buffer.append(chunk[start:index + 1])
+                    self.text = "".join(self._buffer)
+                    self.complete = True
+                    return True
+        self._buffer.append(chunk[start:])
+        self._depth, self._in_string, self._escape = depth, in_string, escape
+        return False
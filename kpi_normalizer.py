@@ -0,0 +1,173 @@
+"""
+Canada REAL Engine - KPI Value Normalizer
+PURPOSE: Parses free-text KPI values such as "+99,300", "3.3%",
+         "−2.1% YoY", "$74.02B" or "27/34" into typed numbers with a unit,
+         an explicit sign and a reporting period. Batches are deduplicated
+         before parsing; an optional vectorized pandas path produces
+         results identical to the pure-Python one.
+"""
+import math
+import os
+import re
+
+# Batches with at least this many distinct strings go through pandas (imported on first use).
+# 0 disables it: pandas' str.extract loops in Python too, and measured slower than the
+# plain path here (see benchmarks/bench_kpi_normalizer.py), so it is opt-in.
+VECTORIZE_THRESHOLD = int(os.environ.get("KPI_VECTORIZE_THRESHOLD", "0"))
+
+_PATTERN = (
+    r"^\s*(?P<trend>[↑↓▲▼])?\s*(?P<sign>[+\-−–])?\s*(?P<currency>C\$|CA\$|CAD|US\$|USD|\$|€|£)?\s*"
+    r"(?P<number>\d[\d,]*(?:\.\d+)?|\.\d+)"
+    r"(?:\s*/\s*(?P<denominator>\d[\d,]*(?:\.\d+)?))?"
+    r"\s*(?P<suffix>%|pp\b|[kK]\b|[mM]\b|[bB]n?\b|thousand\b|million\b|billion\b)?"
+    r"\s*(?P<rest>.*?)\s*$"
+)
+_PERIOD_PATTERN = (
+    r"(?P<period>\bYoY\b|\by/y\b|\byear[- ]over[- ]year\b|\bannual(?:ly)?\b|\bper year\b|/yr\b|"
+    r"\bQoQ\b|\bq/q\b|\bquarter[- ]over[- ]quarter\b|\bMoM\b|\bm/m\b|\bmonth[- ]over[- ]month\b)"
+)
+_UNIT_WORD_PATTERN = r"^(?P<unit_word>years?|months?|weeks?|days?)\b"
+
+_REGEX = re.compile(_PATTERN)
+_PERIOD_REGEX = re.compile(_PERIOD_PATTERN, re.IGNORECASE)
+_UNIT_WORD_REGEX = re.compile(_UNIT_WORD_PATTERN, re.IGNORECASE)
+
+_SCALES = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6, "b": 1e9, "bn": 1e9, "billion": 1e9}
+_CURRENCIES = {"c$": "CAD", "ca$": "CAD", "cad": "CAD", "$": "CAD", "us$": "USD", "usd": "USD", "€": "EUR", "£": "GBP"}
+_PERIODS = {"yoy": "YoY", "y/y": "YoY", "year-over-year": "YoY", "year over year": "YoY", "annual": "YoY",
+            "annually": "YoY", "per year": "YoY", "/yr": "YoY", "qoq": "QoQ", "q/q": "QoQ",
+            "quarter-over-quarter": "QoQ", "quarter over quarter": "QoQ", "mom": "MoM", "m/m": "MoM",
+            "month-over-month": "MoM", "month over month": "MoM"}
+_NEGATIVE = {"-", "−", "–", "↓", "▼"}
+_POSITIVE = {"+", "↑", "▲"}
+
+
+def _assemble(trend, sign, currency, number, denominator, suffix, rest) -> dict:
+    """Builds the normalized dict from the regex groups (shared by both paths)."""
+    value = float(number.replace(",", ""))
+    unit = "count"
+    if denominator:
+        denominator_value = float(denominator.replace(",", ""))
+        value = value / denominator_value if denominator_value else math.nan
+        unit = "ratio"
+    if suffix == "%":
+        unit = "percent"
+    elif suffix == "pp":
+        unit = "percentage_points"
+    elif suffix:
+        value *= _SCALES[suffix.lower()]
+    if currency:
+        unit = _CURRENCIES[currency.lower()]
+    elif rest and unit == "count":
+        word = _UNIT_WORD_REGEX.match(rest)
+        if word:
+            unit = word.group("unit_word").lower().rstrip("s") + "s"
+    explicit = sign or trend
+    signed = -1 if explicit in _NEGATIVE else (1 if explicit in _POSITIVE else None)
+    if signed == -1:
+        value = -value
+    period = None
+    if rest:
+        match = _PERIOD_REGEX.search(rest)
+        if match:
+            period = _PERIODS.get(match.group("period").lower())
+    return {"value": None if math.isnan(value) else value, "unit": unit, "sign": signed, "period": period}
+
+
+def normalize_value(value) -> dict:
+    """Normalizes one KPI value; non-numeric text yields None."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return {"value": float(value), "unit": "count", "sign": None, "period": None}
+    if not isinstance(value, str):
+        return None
+    match = _REGEX.match(value)
+    if not match:
+        return None
+    return _assemble(*match.group("trend", "sign", "currency", "number", "denominator", "suffix", "rest"))
+
+
+def _normalize_vectorized(values: list) -> list:
+    import pandas as pd
+
+    texts = pd.Series([v if isinstance(v, str) else None for v in values], dtype="object")
+    parts = texts.str.extract(_PATTERN)
+    matched = parts["number"].notna().to_numpy()
+    numbers = pd.to_numeric(parts["number"].str.replace(",", "", regex=False), errors="coerce")
+    denominators = pd.to_numeric(parts["denominator"].str.replace(",", "", regex=False), errors="coerce")
+    suffix = parts["suffix"].str.lower()
+    numbers = numbers.where(denominators.isna(), numbers / denominators.where(denominators != 0))
+    numbers = numbers * suffix.map(_SCALES).fillna(1.0)
+    explicit = parts["sign"].fillna(parts["trend"])
+    signs = explicit.map(lambda s: -1 if s in _NEGATIVE else (1 if s in _POSITIVE else None))
+    numbers = numbers.where(signs != -1, -numbers)
+
+    units = pd.Series("count", index=parts.index, dtype="object")
+    units[denominators.notna()] = "ratio"
+    unit_words = parts["rest"].str.extract(_UNIT_WORD_PATTERN, flags=re.IGNORECASE)["unit_word"]
+    units = units.where(~(unit_words.notna() & (units == "count")),
+                        unit_words.str.lower().str.rstrip("s") + "s")
+    units[suffix == "%"] = "percent"
+    units[suffix == "pp"] = "percentage_points"
+    units = parts["currency"].str.lower().map(_CURRENCIES).fillna(units)
+    periods = parts["rest"].str.extract(_PERIOD_PATTERN, flags=re.IGNORECASE)["period"].str.lower().map(_PERIODS)
+
+    # Column-wise lists keep the final row assembly free of per-cell pandas indexing.
+    numbers = numbers.astype("float64").tolist()
+    units = units.tolist()
+    signs = signs.tolist()
+    periods = [period if isinstance(period, str) else None for period in periods.tolist()]
+    results = []
+    for value, ok, number, unit, sign, period in zip(values, matched.tolist(), numbers, units, signs, periods):
+        if isinstance(value, bool) or value is None:
+            results.append(None)
+        elif isinstance(value, (int, float)):
+            results.append({"value": float(value), "unit": "count", "sign": None, "period": None})
+        elif not ok:
+            results.append(None)
+        else:
+            results.append({
+                "value": None if number != number else number,
+                "unit": unit,
+                "sign": None if sign is None or sign != sign else int(sign),
+                "period": period,
+            })
+    return results
+
+
+def normalize_values(values: list) -> list:
+    """Normalizes many KPI values at once.
+
+    Historical KPI values repeat heavily, so each distinct string is parsed
+    once; large sets of distinct strings go through the pandas path.
+    """
+    unique = {}
+    for value in values:
+        if isinstance(value, str):
+            unique.setdefault(value, None)
+    texts = list(unique)
+    parsed = None
+    if VECTORIZE_THRESHOLD and len(texts) >= VECTORIZE_THRESHOLD:
+        try:
+            parsed = _normalize_vectorized(texts)
+        except ImportError:
+            pass
+    if parsed is None:
+        parsed = [normalize_value(text) for text in texts]
+    unique = dict(zip(texts, parsed))
+    results = []
+    for value in values:
+        normalized = unique[value] if isinstance(value, str) else normalize_value(value)
+        # Callers attach these to documents, so never share one dict between KPIs.
+        results.append(dict(normalized) if normalized is not None else None)
+    return results
+
+
+def attach_normalized_kpis(data: dict) -> dict:
+    """Adds a "normalized" entry to every KPI in a full data document (in place) and returns it."""
+    kpis = [kpi for payload in data.values() if isinstance(payload, dict)
+            for kpi in (payload.get("kpis") or []) if isinstance(kpi, dict)]
+    for kpi, normalized in zip(kpis, normalize_values([kpi.get("value") for kpi in kpis])):
+        kpi["normalized"] = normalized
+    return data
@@ -0,0 +1,173 @@
+"""
+Canada REAL Engine - Metrics
+PURPOSE: Minimal in-process counters, gauges and latency histograms,
+         rendered in the Prometheus text exposition format (served at
+         `/metrics` by app.py). Recording a value is a dict lookup and an
+         add under a per-metric lock, so it is safe on the request path.
+
+         Values are per process: under gunicorn each worker reports its
+         own series. The generation script can also write its metrics to
+         a file (`REAL_ENGINE_METRICS_FILE`) for node_exporter's textfile
+         collector.
+"""
+import bisect
+import os
+import threading
+
+METRICS_FILE = os.environ.get("REAL_ENGINE_METRICS_FILE", "")
+
+# Seconds; covers in-memory responses (sub-millisecond) through slow API calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(series))
+        return lines
+
+    def _render_series(self, series: list) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in series]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+    def label_sets(self) -> list:
+        """The label-value tuples recorded so far."""
+        with self._lock:
+            return list(self._series)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS,
+                 registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, plus +Inf, then sum and count.
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _render_series(self, series: list) -> list:
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically writes the exposition text to `path` (node_exporter textfile collector format)."""
+        from storage import atomic_write_text
+
+        atomic_write_text(path, self.render())
+
+
+REGISTRY = Registry()
+
+# --- Web process ---
+HTTP_REQUEST_SECONDS = Histogram(
+    "real_engine_http_request_duration_seconds", "Time to build a response, by route and status.",
+    ("route", "method", "status"))
+SNAPSHOT_RELOADS = Counter(
+    "real_engine_snapshot_reloads_total", "Snapshots swapped into memory, by source (file or publish).",
+    ("source",))
+SNAPSHOT_RELOAD_FAILURES = Counter(
+    "real_engine_snapshot_reload_failures_total", "Data file reloads that failed and kept the previous snapshot.")
+
+# --- Generation ---
+API_REQUEST_SECONDS = Histogram(
+    "real_engine_api_request_duration_seconds", "Perplexity call latency including retries, by topic and outcome.",
+    ("topic", "outcome"))
+API_RETRIES = Counter("real_engine_api_retries_total", "Retried Perplexity attempts, by topic.", ("topic",))
+API_TOKENS = Counter(
+    "real_engine_api_tokens_total", "Tokens reported by the Perplexity API, by topic and kind (prompt/completion).",
+    ("topic", "kind"))
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "real_engine_response_cache_lookups_total", "Persistent response cache lookups, by topic and result.",
+    ("topic", "result"))
+VALIDATION_FAILURES = Counter(
+    "real_engine_validation_failures_total", "API responses rejected by the topic schema.", ("topic",))
+TOPIC_GENERATIONS = Counter(
+    "real_engine_topic_generations_total",
+    "Topic refresh outcomes: success, kept_previous or fallback. Fallback rate = fallback / total.",
+    ("topic", "outcome"))
@@ -0,0 +1,194 @@
+"""
+Canada REAL Engine - Perplexity HTTP Client
+PURPOSE: A reusable client for the Perplexity chat completions endpoint.
+         It keeps a keep-alive connection pool, retries 429/5xx and
+         connection errors with exponential backoff and jitter (honouring
+         `Retry-After`), uses separate connect/read timeouts and records
+         per-call latency and retry counts. `requests` is imported when the
+         first client is created, so runs that make no API call (nothing
+         stale, every answer cached) do not pay for importing it.
+"""
+import collections
+import datetime
+import email.utils
+import os
+import random
+import threading
+import time
+
+import codec
+from metrics import API_REQUEST_SECONDS, API_RETRIES
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CallStats:
+    """Timing and retry information for one logical API call (`finished` is a perf_counter() reading)."""
+    __slots__ = ("topic_id", "latency", "attempts", "status", "ok", "finished")
+
+    def __init__(self, topic_id: str, latency: float, attempts: int, status, ok: bool, finished: float = None):
+        self.topic_id = topic_id
+        self.latency = latency
+        self.attempts = attempts
+        self.status = status
+        self.ok = ok
+        self.finished = time.perf_counter() if finished is None else finished
+
+    @property
+    def retries(self) -> int:
+        return self.attempts - 1
+
+    def as_dict(self) -> dict:
+        return {"topic_id": self.topic_id, "latency": round(self.latency, 4), "attempts": self.attempts,
+                "retries": self.retries, "status": self.status, "ok": self.ok}
+
+
+def parse_retry_after(value: str):
+    """Returns the delay in seconds from a `Retry-After` header, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class PerplexityClient:
+    def __init__(self, url: str, api_key: str = None, connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 pool_size: int = 10, stats_size: int = 256):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.stats = collections.deque(maxlen=stats_size)
+        self._stats_lock = threading.Lock()
+
+    def _backoff(self, attempt: int, retry_after=None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter: uniform in [0, base * 2^attempt], capped.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, stats: CallStats) -> None:
+        with self._stats_lock:
+            self.stats.append(stats)
+        API_REQUEST_SECONDS.observe(stats.latency, topic=stats.topic_id, outcome="ok" if stats.ok else "error")
+        if stats.retries:
+            API_RETRIES.inc(stats.retries, topic=stats.topic_id)
+
+    def post(self, payload: dict, topic_id: str = "", api_key: str = None, rate_limiter=None,
+             **kwargs) -> "requests.Response":
+        """POSTs `payload`, retrying transient failures. Raises on final failure.
+
+        `rate_limiter` (e.g. a TokenBucket) is acquired before every attempt, retries included.
+        """
+        import requests
+
+        headers = {"Authorization": f"Bearer {api_key or self.api_key}", "Content-Type": "application/json"}
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            retry_after = None
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            try:
+                response = self.session.post(self.url, headers=headers, json=payload, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt > self.max_retries:
+                    self._record(CallStats(topic_id, time.perf_counter() - start, attempt, None, False))
+                    raise
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt > self.max_retries:
+                    ok = response.ok
+                    self._record(CallStats(topic_id, time.perf_counter() - start, attempt, response.status_code, ok))
+                    response.raise_for_status()
+                    return response
+                error = f"HTTP {response.status_code}"
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                response.close()
+            delay = self._backoff(attempt - 1, retry_after)
+            print(f"--> Retrying Perplexity call for {topic_id} in {delay:.1f}s ({error}, attempt {attempt}/{self.max_retries + 1})")
+            time.sleep(delay)
+
+    def summary(self, since: float = None) -> dict:
+        """Aggregate latency/retry numbers over the recorded calls.
+
+        With `since` (a time.perf_counter() reading), only calls that finished after it count.
+        """
+        with self._stats_lock:
+            calls = [c for c in self.stats if since is None or c.finished >= since]
+        if not calls:
+            return {"calls": 0, "retries": 0, "failures": 0, "total_latency": 0.0, "max_latency": 0.0}
+        return {
+            "calls": len(calls),
+            "retries": sum(c.retries for c in calls),
+            "failures": sum(1 for c in calls if not c.ok),
+            "total_latency": round(sum(c.latency for c in calls), 4),
+            "max_latency": round(max(c.latency for c in calls), 4),
+            "per_call": [c.as_dict() for c in calls],
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def iter_stream_deltas(response: "requests.Response", usage: dict = None):
+    """Yields (content delta, finish_reason) from a streamed (SSE) chat completion.
+
+    If given, `usage` is updated with any token counts the stream reports.
+    """
+    response.encoding = "utf-8"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            chunk = codec.loads(data)
+            choice = chunk["choices"][0]
+        except (ValueError, KeyError, IndexError, TypeError):
+            continue
+        if usage is not None and isinstance(chunk.get("usage"), dict):
+            usage.update(chunk["usage"])
+        delta = choice.get("delta") or choice.get("message") or {}
+        yield delta.get("content") or "", choice.get("finish_reason")
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client(url: str) -> PerplexityClient:
+    """Process-wide client shared by every `call_perplexity_api` call."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None or _default_client.url != url:
+            if _default_client is not None:
+                _default_client.close()
+            _default_client = PerplexityClient(
+                url,
+                connect_timeout=float(os.environ.get("PERPLEXITY_CONNECT_TIMEOUT", "5")),
+                read_timeout=float(os.environ.get("PERPLEXITY_READ_TIMEOUT", "60")),
+                max_retries=int(os.environ.get("PERPLEXITY_MAX_RETRIES", "3")),
+                pool_size=int(os.environ.get("PERPLEXITY_POOL_SIZE", "10")),
+            )
+        return _default_client
@@ -6,30 +6,29 @@ PURPOSE: This file contains ALL prompts, resource maps, and helper
          It does not run any processes by itself.
 """
 import datetime
-import requests
-import json
 import os
+import codec
+from json_stream import IncrementalJSONExtractor
+from metrics import API_TOKENS, RESPONSE_CACHE_LOOKUPS
+from perplexity_client import get_default_client, iter_stream_deltas
+from response_cache import get_default_cache, request_key
+from schemas import is_valid, repair_payload
+from topic_registry import get_registry
 
-def word_count(text: str) -> int:
-    return len(text.strip().split())
+PERPLEXITY_API_URL = os.environ.get("PERPLEXITY_API_URL", "https://api.perplexity.ai/chat/completions")
+# Streaming mode parses the JSON object as it arrives and stops reading once it closes.
+PERPLEXITY_STREAM = os.environ.get("PERPLEXITY_STREAM", "0") == "1"
+# How many times a truncated streamed answer is resumed before giving up.
+PERPLEXITY_STREAM_RESUMES = int(os.environ.get("PERPLEXITY_STREAM_RESUMES", "1"))
+RESUME_PROMPT = "Your answer was cut off. Continue exactly where you stopped, without repeating anything or adding commentary."
+# Batched requests get this many completion tokens per topic, up to the cap.
+MAX_TOKENS_PER_TOPIC = 2000
+PERPLEXITY_BATCH_MAX_TOKENS = int(os.environ.get("PERPLEXITY_BATCH_MAX_TOKENS", "8000"))
 
 def validate_output(json_obj: dict) -> bool:
+    """True when the payload matches its topic schema (see schemas.py for the detailed errors)."""
     if not isinstance(json_obj, dict): return False
-    if not (isinstance(json_obj.get("headline"), str) and (isinstance(json_obj.get("summary"), str) or isinstance(json_obj.get("regional_content"), dict))): return False
-    if not (isinstance(json_obj.get("kpis"), list) and len(json_obj.get("kpis", [])) >= 3): return False
-    if json_obj.get("topic") in ["canada_immigration"] and json_obj.get("regional_content"):
-        regional_content = json_obj.get("regional_content", {})
-        required_regions = ["canada", "uk", "europe", "southeast-asia"]
-        if not all(region in regional_content for region in required_regions): return False
-        for region in required_regions:
-            if region in regional_content:
-                word_cnt = word_count(regional_content[region])
-                if word_cnt < 80 or word_cnt > 120: return False
-    relevance = json_obj.get("relevance", {})
-    if not (isinstance(relevance, dict) and isinstance(relevance.get("program_suggestions", []), list) and isinstance(relevance.get("target_students", ""), str)): return False
-    chart = json_obj.get("chart", {})
-    if not (isinstance(chart, dict) and isinstance(chart.get("chart_type", ""), str) and isinstance(chart.get("data_points", []), list)): return False
-    return True
+    return is_valid(json_obj, json_obj.get("topic"))
 
 # -------- SECTION-SPECIFIC PROMPTS --------
 
@@ -111,6 +110,8 @@ GOAL
 ▪ Output JSON object only (no comments or extra text).
 """
 
+# topic_id -> recently cited, not known-broken URLs; filled from the resource registry by
+# refresh_resource_map before each generation cycle and listed in the topic's prompt.
 RESOURCE_MAP = {
     "canada_immigration": [],
     "canada_labour": [],
@@ -120,52 +121,222 @@ RESOURCE_MAP = {
     "canada_international_education": []
 }
 
+RESOURCE_ROTATION_HEADING = "\nRESOURCE_MAP (sources you cited in your last runs; known-broken links already removed)\n"
+RESOURCE_ROTATION_NOTE = RESOURCE_ROTATION_HEADING + """{urls}
+Rotate at least 4 sources that are not on this list into "latest_resources".
+"""
+
+BATCH_PROMPT_HEADER = """
+You are Canada REAL Engine Analyst. Several dashboard sections are requested in one go.
+Answer with ONE JSON object whose keys are exactly the section ids below (the text after "###").
+The value for each key is the JSON object you would return for that section on its own; follow each section's instructions independently.
+STRICT OUTPUT RULE: Output that single JSON object only.
+"""
+
+def refresh_resource_map(registry, runs: int = 4, limit: int = 20) -> dict:
+    """Fills RESOURCE_MAP with each topic's recently cited, not known-broken URLs from the resource registry."""
+    for topic_id in get_registry().ids():
+        RESOURCE_MAP[topic_id] = registry.recent(topic_id, runs, limit)
+    return RESOURCE_MAP
+
+def get_batch_prompt(topic_ids: list) -> str:
+    """One prompt asking for several topics at once, answered as {topic_id: payload}."""
+    sections = [f"### {topic_id}\n{get_prompt_for_topic(topic_id).strip()}" for topic_id in topic_ids]
+    return BATCH_PROMPT_HEADER + "\n" + "\n\n".join(sections) + "\n"
+
 def get_prompt_for_topic(topic_id: str) -> str:
-    if topic_id == "canada_immigration":
-        return CANADA_IMMIGRATION_PROMPT
-    if topic_id == "canada_labour":
-        return CANADA_LABOUR_PROMPT
-    if topic_id == "canada_tech_innovation":
-        return CANADA_TECH_PROMPT
-    if topic_id == "canada_startup_ecosystem":
-        return CANADA_STARTUP_PROMPT
-    if topic_id == "canada_regional_development":
-        return CANADA_REGIONAL_PROMPT
-    if topic_id == "canada_international_education":
-        return CANADA_EDUCATION_PROMPT
-    return CANADA_BASE_PROMPT
-
-def call_perplexity_api(prompt: str, topic_id: str) -> dict:
-    api_key = os.environ.get("PERPLEXITY_API_KEY")
-    if not api_key:
-        print(f"ERROR: PERPLEXITY_API_KEY not set for {topic_id}.")
-        return None
-    url = "https://api.perplexity.ai/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    payload = {
+    topic = get_registry().get(topic_id)
+    prompt = topic.prompt if topic is not None else CANADA_BASE_PROMPT
+    recent = RESOURCE_MAP.get(topic_id)
+    if recent:
+        prompt += RESOURCE_ROTATION_NOTE.format(urls="\n".join(f"▪ {url}" for url in recent))
+    return prompt
+
+def build_request(prompt: str, max_tokens: int = MAX_TOKENS_PER_TOPIC) -> dict:
+    return {
         "model": "sonar-pro",
         "messages": [
             {"role": "system", "content": "You are a Canada REAL Engine analyst. Only output valid strict JSON; no comments or extra text."},
             {"role": "user", "content": prompt}
         ],
-        "max_tokens": 2000,
+        "max_tokens": max_tokens,
         "temperature": 0.7
     }
+
+def cache_key_for(prompt: str, max_tokens: int = MAX_TOKENS_PER_TOPIC) -> str:
+    """Response cache key of a topic prompt.
+
+    The RESOURCE_MAP note is left out: it changes with every refresh of the
+    topic, and an answer stays reusable for the rest of its freshness window.
+    """
+    return request_key(build_request(prompt.partition(RESOURCE_ROTATION_HEADING)[0], max_tokens))
+
+def call_perplexity_api(prompt: str, topic_id: str, force_refresh: bool = False, rate_limiter=None,
+                        not_before: float = None) -> dict:
+    """Returns the topic's answer as a dict, or None.
+
+    Cached answers created before `not_before` (epoch seconds, the start of
+    the topic's current freshness window; see auto_update_real_engine.cache_floors)
+    are not reused, so a due refresh always asks the API again.
+    """
+    payload = build_request(prompt)
+    cache = get_default_cache()
+    cache_key = cache_key_for(prompt)
+    if cache is not None and not force_refresh:
+        cached = cache.get(cache_key, topic_id, not_before)
+        RESPONSE_CACHE_LOOKUPS.inc(topic=topic_id, result="miss" if cached is None else "hit")
+        if cached is not None:
+            print(f"--> Using cached Perplexity response for Canada topic: {topic_id}")
+            return cached
+    api_key = os.environ.get("PERPLEXITY_API_KEY")
+    if not api_key:
+        print(f"ERROR: PERPLEXITY_API_KEY not set for {topic_id}.")
+        return None
+    client = get_default_client(PERPLEXITY_API_URL)
     try:
         print(f"--> Calling Perplexity API for Canada topic: {topic_id}")
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        content = response.json()["choices"][0]["message"]["content"]
-        start_index = content.find('{')
-        end_index = content.rfind('}')
-        if start_index != -1 and end_index > start_index:
-            return json.loads(content[start_index:end_index+1])
+        if PERPLEXITY_STREAM:
+            result = _stream_json_completion(client, payload, topic_id, api_key, rate_limiter)
         else:
-            print(f"ERROR: Could not find valid JSON for Canada {topic_id}.")
-            return None
+            response = client.post(payload, topic_id, api_key=api_key, rate_limiter=rate_limiter)
+            body = response.json()
+            record_token_usage(topic_id, body.get("usage"))
+            content = body["choices"][0]["message"]["content"]
+            result = _extract_json(content, topic_id)
     except Exception as e:
         print(f"API call FAILED for Canada {topic_id}: {e}")
         return None
+    return _finish_response(result, topic_id, cache, cache_key)
+
+def _finish_response(result, topic_id: str, cache, cache_key: str):
+    if not isinstance(result, dict):
+        return None
+    repairs = repair_payload(result, topic_id)
+    if repairs:
+        print(f"--> Repaired Canada {topic_id} response: {'; '.join(repairs)}")
+    # Only cache responses that would be accepted, so a bad answer is retried next time.
+    if cache is not None and is_valid(result, topic_id):
+        cache.put(cache_key, result, topic_id)
+    return result
+
+def call_perplexity_batch(topic_ids: list, force_refresh: bool = False, rate_limiter=None,
+                          not_before: dict = None) -> dict:
+    """Asks for several topics in a single request; returns {topic_id: payload or None}.
+
+    Topics found in the response cache are answered from it and left out of
+    the request. Each topic's part of the answer is repaired and cached under
+    the same key an individual call would use, so batched and one-by-one runs
+    share cache entries. Missing or unusable parts come back as None.
+    `not_before` maps topic ids to the epoch seconds before which their
+    cached answers are not reused (see `call_perplexity_api`).
+    """
+    not_before = not_before or {}
+    cache = get_default_cache()
+    results = {}
+    pending = []
+    for topic_id in topic_ids:
+        cached = None
+        if cache is not None and not force_refresh:
+            cached = cache.get(cache_key_for(get_prompt_for_topic(topic_id)), topic_id,
+                               not_before.get(topic_id))
+            RESPONSE_CACHE_LOOKUPS.inc(topic=topic_id, result="miss" if cached is None else "hit")
+        if cached is not None:
+            print(f"--> Using cached Perplexity response for Canada topic: {topic_id}")
+            results[topic_id] = cached
+        else:
+            pending.append(topic_id)
+    if len(pending) == 1:
+        # Nothing to batch; the cache was already checked above.
+        results[pending[0]] = call_perplexity_api(get_prompt_for_topic(pending[0]), pending[0], force_refresh=True,
+                                                  rate_limiter=rate_limiter)
+    elif pending:
+        answer = _call_batch(pending, rate_limiter)
+        for topic_id in pending:
+            cache_key = cache_key_for(get_prompt_for_topic(topic_id))
+            results[topic_id] = _finish_response(answer.get(topic_id), topic_id, cache, cache_key)
+    return {topic_id: results.get(topic_id) for topic_id in topic_ids}
+
+def _call_batch(topic_ids: list, rate_limiter=None) -> dict:
+    api_key = os.environ.get("PERPLEXITY_API_KEY")
+    if not api_key:
+        print(f"ERROR: PERPLEXITY_API_KEY not set for {', '.join(topic_ids)}.")
+        return {}
+    max_tokens = min(MAX_TOKENS_PER_TOPIC * len(topic_ids), PERPLEXITY_BATCH_MAX_TOKENS)
+    payload = build_request(get_batch_prompt(topic_ids), max_tokens=max_tokens)
+    client = get_default_client(PERPLEXITY_API_URL)
+    try:
+        print(f"--> Calling Perplexity API once for {len(topic_ids)} Canada topics: {', '.join(topic_ids)}")
+        if PERPLEXITY_STREAM:
+            answer = _stream_json_completion(client, payload, "batch", api_key, rate_limiter)
+        else:
+            response = client.post(payload, "batch", api_key=api_key, rate_limiter=rate_limiter)
+            body = response.json()
+            record_token_usage("batch", body.get("usage"))
+            answer = _extract_json(body["choices"][0]["message"]["content"], "batch")
+    except Exception as e:
+        print(f"Batched API call FAILED for Canada {', '.join(topic_ids)}: {e}")
+        return {}
+    return answer if isinstance(answer, dict) else {}
+
+def _extract_json(content: str, topic_id: str):
+    start_index = content.find('{')
+    end_index = content.rfind('}')
+    if start_index != -1 and end_index > start_index:
+        return codec.loads(content[start_index:end_index+1])
+    print(f"ERROR: Could not find valid JSON for Canada {topic_id}.")
+    return None
+
+def _stream_json_completion(client, payload: dict, topic_id: str, api_key: str, rate_limiter=None):
+    """Streams the completion, returning the parsed object as soon as it closes.
+
+    A stream that ends with the object still open (finish_reason "length",
+    i.e. max_tokens reached) is resumed by asking the model to continue.
+    """
+    extractor = IncrementalJSONExtractor()
+    messages = list(payload["messages"])
+    received = []
+    for _ in range(PERPLEXITY_STREAM_RESUMES + 1):
+        response = client.post(dict(payload, messages=messages, stream=True), topic_id, api_key=api_key,
+                               rate_limiter=rate_limiter, stream=True)
+        finish_reason = None
+        usage = {}
+        try:
+            for delta, finish_reason in iter_stream_deltas(response, usage):
+                received.append(delta)
+                if extractor.feed(delta):
+                    # Stop reading: anything after the object is prose we do not need.
+                    return codec.loads(extractor.text)
+        finally:
+            response.close()
+            record_token_usage(topic_id, usage)
+        if not extractor.started:
+            print(f"ERROR: Could not find valid JSON for Canada {topic_id}.")
+            return None
+        print(f"--> Streamed answer for Canada {topic_id} was truncated (finish_reason={finish_reason}).")
+        messages = list(payload["messages"]) + [
+            {"role": "assistant", "content": "".join(received)},
+            {"role": "user", "content": RESUME_PROMPT},
+        ]
+    return None
+
+def record_token_usage(topic_id: str, usage) -> None:
+    """Adds the API's reported prompt/completion token counts to the metrics."""
+    if not isinstance(usage, dict):
+        return
+    for kind in ("prompt", "completion"):
+        count = usage.get(f"{kind}_tokens")
+        if isinstance(count, (int, float)) and count > 0:
+            API_TOKENS.inc(count, topic=topic_id, kind=kind)
+
+def get_response_cache_stats(since: dict = None) -> dict:
+    """Hit/miss counters for the persistent Perplexity response cache (since an earlier result, if given)."""
+    cache = get_default_cache()
+    return cache.stats(since) if cache is not None else {}
+
+def get_api_call_stats(since: float = None) -> dict:
+    """Per-call latency and retry counts recorded by the shared Perplexity client
+    (only calls finished after the time.perf_counter() reading `since`, if given)."""
+    return get_default_client(PERPLEXITY_API_URL).summary(since)
 
 def create_structured_fallback(topic_id: str) -> dict:
     print(f"--> Creating structured fallback for Canada topic: {topic_id}")
@@ -178,7 +349,8 @@ def create_structured_fallback(topic_id: str) -> dict:
         "last_updated": datetime.datetime.now().isoformat(), 
         "topic": topic_id
     }
-    if topic_id == "canada_immigration":
+    topic = get_registry().get(topic_id)
+    if topic is not None and topic.layout == "regional":
         fallback["regional_content"] = {
             "canada": "Loading Canadian immigration data...", 
             "uk": "Loading UK comparison data...", 
@@ -0,0 +1,46 @@
+"""
+Canada REAL Engine - Rate Limiting Helpers
+PURPOSE: A small thread-safe token bucket used to pace outbound API calls
+         when several topics are generated concurrently.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens are added per second, up to `capacity`.
+
+    `acquire()` blocks until a token is available, so callers are spread out
+    to at most `rate` requests/sec on average with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,325 @@
+"""
+Canada REAL Engine - Resource Registry & Link Checker
+PURPOSE: A persistent SQLite index of every URL the API cites (in
+         `latest_resources`, markdown links or any other text field),
+         keyed by a 64-bit hash of the normalized URL. It records first and
+         last sighting, the run in which each URL was last cited, which
+         topics cited it, and how often it rotated back in after being
+         absent. "Was this used in the last N runs?" is a primary-key
+         lookup, so it stays O(1)-ish at hundreds of thousands of entries.
+
+         Run ids are global (one per generation cycle), but a cycle only
+         refreshes the topics that are due. Rotation and per-topic recency
+         are therefore counted over each topic's own runs (`topic_runs`):
+         a URL is "returning" when it was missing from that topic's previous
+         refresh, not merely from the previous global run.
+
+         `check_links` probes many URLs through a bounded thread pool and a
+         pooled HTTP session, and `ResourceRegistry.record_link_status`
+         stores the results.
+
+Usage: python resource_registry.py --check [--limit 500] [--max-age-hours 24]
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+RESOURCE_DB_PATH = os.environ.get("RESOURCE_DB_PATH", "real-engine-resources.sqlite3")
+LINK_CHECK_WORKERS = int(os.environ.get("LINK_CHECK_WORKERS", "16"))
+LINK_CHECK_TIMEOUT = float(os.environ.get("LINK_CHECK_TIMEOUT", "5"))
+
+URL_PATTERN = re.compile(r"https?://[^\s<>\"'\]\[)(]+", re.IGNORECASE)
+# Query parameters that only track the click and never change the page.
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for hashing: scheme-less, lower-case host without "www.",
+    no default port, fragment or tracking parameters, sorted query, no trailing slash."""
+    parts = urllib.parse.urlsplit(url.strip().rstrip(".,;:"))
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted((key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+                   if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS)
+    normalized = host + path
+    if query:
+        normalized += "?" + urllib.parse.urlencode(query)
+    return normalized
+
+
+def url_id(url: str) -> int:
+    """Signed 64-bit key (SQLite INTEGER PRIMARY KEY) of the normalized URL."""
+    digest = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def extract_urls(payload) -> list:
+    """Every distinct http(s) URL in the payload's strings, in order of appearance."""
+    urls = {}
+    stack = [payload]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            if "http" in value:
+                for match in URL_PATTERN.findall(value):
+                    urls.setdefault(match.rstrip(".,;:"), None)
+        elif isinstance(value, dict):
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+    return list(urls)
+
+
+class ResourceRegistry:
+    def __init__(self, path: str = RESOURCE_DB_PATH, readonly: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, started_at REAL)")
+        # `id` is the URL hash and the rowid itself, so lookups are a single B-tree probe.
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resources ("
+            " id INTEGER PRIMARY KEY, url TEXT NOT NULL, domain TEXT NOT NULL,"
+            " first_seen REAL NOT NULL, last_seen REAL NOT NULL, first_run INTEGER NOT NULL,"
+            " last_run INTEGER NOT NULL, times_cited INTEGER NOT NULL DEFAULT 1,"
+            " rotations INTEGER NOT NULL DEFAULT 0, status INTEGER, checked_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resource_topics ("
+            " topic TEXT NOT NULL, id INTEGER NOT NULL, first_run INTEGER NOT NULL, last_run INTEGER NOT NULL,"
+            " times_cited INTEGER NOT NULL DEFAULT 1, PRIMARY KEY (topic, id)) WITHOUT ROWID"
+        )
+        # The runs in which each topic was refreshed (and so recorded its citations).
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS topic_runs (topic TEXT NOT NULL, run_id INTEGER NOT NULL,"
+            " PRIMARY KEY (topic, run_id)) WITHOUT ROWID"
+        )
+        if self._conn.execute("SELECT 1 FROM topic_runs LIMIT 1").fetchone() is None:
+            # Registries from before topic_runs existed: every run a citation remembers is one of the topic's runs.
+            self._conn.execute("INSERT OR IGNORE INTO topic_runs SELECT topic, first_run FROM resource_topics"
+                               " UNION SELECT topic, last_run FROM resource_topics")
+        # Serves "recently cited by topic" and "oldest link checks first" without a table scan.
+        self._conn.execute("CREATE INDEX IF NOT EXISTS resource_topics_recent ON resource_topics (topic, last_run)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS resources_checked ON resources (checked_at)")
+        self._conn.commit()
+
+    def current_run(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(run_id) FROM runs").fetchone()
+        return row[0] or 0
+
+    def start_run(self, timestamp: float = None) -> int:
+        """Opens a new generation run; citations recorded with its id count as one rotation step."""
+        with self._lock:
+            cursor = self._conn.execute("INSERT INTO runs (started_at) VALUES (?)", (timestamp or time.time(),))
+            self._conn.commit()
+        return cursor.lastrowid
+
+    def record(self, run_id: int, topic_id: str, urls: list, timestamp: float = None) -> dict:
+        """Registers the URLs `topic_id` cited in `run_id`.
+
+        Returns counts of {"cited", "new", "returning", "repeated"}, judged
+        against the topic's own previous run: returning URLs were cited by the
+        topic before but not in that run (a rotation back in), repeated ones
+        were. New URLs are not in the registry at all; URLs only other topics
+        cited so far count as repeated.
+        """
+        now = timestamp or time.time()
+        ids = {}
+        for url in urls:
+            ids.setdefault(url_id(url), url)
+        stats = {"cited": len(ids), "new": 0, "returning": 0, "repeated": 0}
+        with self._lock:
+            previous = self._conn.execute("SELECT MAX(run_id) FROM topic_runs WHERE topic = ? AND run_id < ?",
+                                          (topic_id, run_id)).fetchone()[0]
+            self._conn.execute("INSERT OR IGNORE INTO topic_runs (topic, run_id) VALUES (?, ?)", (topic_id, run_id))
+            existing = {}
+            keys = list(ids)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for rid, last_run, topic_last_run in self._conn.execute(
+                        f"SELECT r.id, r.last_run, t.last_run FROM resources r LEFT JOIN resource_topics t"
+                        f" ON t.topic = ? AND t.id = r.id WHERE r.id IN ({placeholders})", [topic_id] + chunk):
+                    existing[rid] = (last_run, topic_last_run)
+            inserts, updates = [], []
+            for rid, url in ids.items():
+                if rid not in existing:
+                    stats["new"] += 1
+                    domain = urllib.parse.urlsplit(url).hostname or ""
+                    inserts.append((rid, url, domain.lower(), now, now, run_id, run_id))
+                    continue
+                last_run, topic_last_run = existing[rid]
+                if topic_last_run == run_id:
+                    continue  # already recorded for this topic in this run
+                rotated = 1 if topic_last_run is not None and topic_last_run != previous else 0
+                stats["returning" if rotated else "repeated"] += 1
+                # times_cited counts runs, however many topics cite the URL in one of them.
+                updates.append((now, run_id, 0 if last_run == run_id else 1, rotated, rid))
+            self._conn.executemany(
+                "INSERT INTO resources (id, url, domain, first_seen, last_seen, first_run, last_run)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", inserts)
+            self._conn.executemany(
+                "UPDATE resources SET last_seen = ?, last_run = ?, times_cited = times_cited + ?,"
+                " rotations = rotations + ? WHERE id = ?", updates)
+            self._conn.executemany(
+                "INSERT INTO resource_topics (topic, id, first_run, last_run) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (topic, id) DO UPDATE SET last_run = excluded.last_run,"
+                " times_cited = times_cited + 1",
+                [(topic_id, rid, run_id, run_id) for rid in ids])
+            self._conn.commit()
+        return stats
+
+    def used_within(self, url: str, runs: int, topic_id: str = None) -> bool:
+        """True if `url` was cited in the last `runs` runs, or, with `topic_id`, in that topic's last `runs` runs."""
+        rid = url_id(url)
+        with self._lock:
+            if topic_id is None:
+                row = self._conn.execute(
+                    "SELECT last_run > (SELECT IFNULL(MAX(run_id), 0) FROM runs) - ? FROM resources WHERE id = ?",
+                    (runs, rid)).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT last_run >= ? FROM resource_topics WHERE topic = ? AND id = ?",
+                    (self._topic_cutoff(topic_id, runs), topic_id, rid)).fetchone()
+        return bool(row and row[0])
+
+    def _topic_cutoff(self, topic_id: str, runs: int) -> int:
+        """Oldest run id among `topic_id`'s last `runs` runs (0 if it has had fewer). Call with the lock held."""
+        row = self._conn.execute("SELECT run_id FROM topic_runs WHERE topic = ? ORDER BY run_id DESC LIMIT 1 OFFSET ?",
+                                 (topic_id, max(runs, 1) - 1)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, url: str) -> dict:
+        """The registry entry for `url` (with its citing topics), or None."""
+        rid = url_id(url)
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM resources WHERE id = ?", (rid,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            entry = dict(zip([column[0] for column in cursor.description], row))
+            entry["topics"] = [topic for (topic,) in self._conn.execute(
+                "SELECT topic FROM resource_topics WHERE id = ? ORDER BY topic", (rid,))]
+        return entry
+
+    def recent(self, topic_id: str, runs: int, limit: int = 50) -> list:
+        """URLs `topic_id` cited in its last `runs` runs, newest first; known-broken links are skipped."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.url FROM resource_topics t JOIN resources r ON r.id = t.id"
+                " WHERE t.topic = ? AND t.last_run >= ? AND (r.status IS NULL OR (r.status > 0 AND r.status < 400))"
+                " ORDER BY t.last_run DESC, r.times_cited DESC LIMIT ?",
+                (topic_id, self._topic_cutoff(topic_id, runs), limit)).fetchall()
+        return [row[0] for row in rows]
+
+    def due_for_check(self, max_age_seconds: float, limit: int) -> list:
+        """URLs never checked, or last checked more than `max_age_seconds` ago (oldest first)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM resources WHERE checked_at IS NULL OR checked_at < ?"
+                " ORDER BY checked_at IS NOT NULL, checked_at LIMIT ?",
+                (time.time() - max_age_seconds, limit)).fetchall()
+        return [row[0] for row in rows]
+
+    def record_link_status(self, statuses: dict, timestamp: float = None) -> None:
+        """Stores {url: HTTP status or None (unreachable, stored as 0)} from `check_links`."""
+        now = timestamp or time.time()
+        with self._lock:
+            self._conn.executemany("UPDATE resources SET status = ?, checked_at = ? WHERE id = ?",
+                                   [(status if status is not None else 0, now, url_id(url))
+                                    for url, status in statuses.items()])
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total, broken, checked = self._conn.execute(
+                "SELECT COUNT(*), SUM(status = 0 OR status >= 400), SUM(checked_at IS NOT NULL) FROM resources"
+            ).fetchone()
+            runs = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        return {"resources": total, "checked": checked or 0, "broken": broken or 0, "runs": runs}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def check_links(urls: list, max_workers: int = LINK_CHECK_WORKERS, timeout: float = LINK_CHECK_TIMEOUT,
+                session=None) -> dict:
+    """Probes `urls` concurrently; returns {url: final HTTP status, or None if unreachable}.
+
+    At most `max_workers` requests are in flight, over one pooled session.
+    HEAD is tried first; servers that reject it (405/501) get a streamed GET.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    own_session = session is None
+    if own_session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = "CanadaRealEngine-LinkChecker/1.0"
+
+    def probe(url: str):
+        try:
+            response = session.head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code in (405, 501):
+                response = session.get(url, timeout=timeout, allow_redirects=True, stream=True)
+                response.close()
+            return response.status_code
+        except requests.RequestException:
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls) or 1)),
+                                thread_name_prefix="link-check") as pool:
+            return dict(zip(urls, pool.map(probe, urls)))
+    finally:
+        if own_session:
+            session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canada REAL Engine resource registry")
+    parser.add_argument("--check", action="store_true", help="check links that are due and store their status")
+    parser.add_argument("--limit", type=int, default=500, help="links to check per invocation")
+    parser.add_argument("--max-age-hours", type=float, default=24.0, help="re-check links older than this")
+    args = parser.parse_args()
+
+    registry = ResourceRegistry()
+    try:
+        if args.check:
+            urls = registry.due_for_check(args.max_age_hours * 3600, args.limit)
+            print(f"🔗 Checking {len(urls)} Canada resource links ({LINK_CHECK_WORKERS} at a time)...")
+            start = time.perf_counter()
+            statuses = check_links(urls)
+            registry.record_link_status(statuses)
+            broken = sum(1 for status in statuses.values() if status is None or status >= 400)
+            print(f"✅ Checked {len(urls)} links in {time.perf_counter() - start:.1f}s; {broken} broken or unreachable.")
+        stats = registry.stats()
+        print(f"📚 {stats['resources']} resources over {stats['runs']} runs; "
+              f"{stats['checked']} checked, {stats['broken']} broken.")
+    finally:
+        registry.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Canada REAL Engine - Persistent Perplexity Response Cache
+PURPOSE: A small SQLite-backed cache of validated Perplexity results keyed
+         by a hash of (model, messages, parameters). Entries expire after a
+         per-topic TTL and the cache is size-bounded with least-recently-
+         used eviction, so restarts, redeploys and re-runs of a partially
+         failed cycle do not pay for calls that already succeeded.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import codec
+
+CACHE_PATH = os.environ.get("PERPLEXITY_CACHE_PATH", "perplexity_cache.sqlite3")
+DEFAULT_TTL_SECONDS = float(os.environ.get("PERPLEXITY_CACHE_TTL", str(6 * 3600)))
+MAX_BYTES = int(os.environ.get("PERPLEXITY_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+MAX_ENTRIES = int(os.environ.get("PERPLEXITY_CACHE_MAX_ENTRIES", "1000"))
+
+
+def _parse_topic_ttls(value: str) -> dict:
+    """Parses "topic=seconds,topic=seconds" overrides."""
+    ttls = {}
+    for item in value.split(","):
+        topic_id, _, seconds = item.partition("=")
+        if topic_id.strip() and seconds.strip():
+            ttls[topic_id.strip()] = float(seconds)
+    return ttls
+
+
+TOPIC_TTL_SECONDS = _parse_topic_ttls(os.environ.get("PERPLEXITY_CACHE_TOPIC_TTL", ""))
+
+
+def request_key(payload: dict) -> str:
+    """Stable hash of the request body (model, messages and sampling parameters)."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES, max_entries: int = MAX_ENTRIES,
+                 default_ttl: float = DEFAULT_TTL_SECONDS, topic_ttls: dict = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.topic_ttls = TOPIC_TTL_SECONDS if topic_ttls is None else topic_ttls
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, topic_id TEXT, created_at REAL, last_access REAL, size INTEGER, value BLOB)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def ttl_for(self, topic_id: str) -> float:
+        return self.topic_ttls.get(topic_id, self.default_ttl)
+
+    def get(self, key: str, topic_id: str = "", not_before: float = None):
+        """Returns the cached value, or None on a miss or expired entry.
+
+        Entries created before `not_before` (epoch seconds) count as expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT created_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[0] > self.ttl_for(topic_id) or (not_before is not None and row[0] < not_before):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return codec.loads(row[1])
+
+    def put(self, key: str, value, topic_id: str = "") -> None:
+        blob = codec.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, topic_id, created_at, last_access, size, value)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (key, topic_id, now, now, len(blob), blob))
+            self._evict()
+
+    def _evict(self) -> None:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        while count > self.max_entries or (total > self.max_bytes and count > 1):
+            key, size = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 1").fetchone()
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count, total = count - 1, total - size
+            self.evictions += 1
+
+    def stats(self, since: dict = None) -> dict:
+        """Counters and size; with `since` (an earlier stats() result), hits, misses and
+        evictions count only what happened after it."""
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        since = since or {}
+        hits = self.hits - since.get("hits", 0)
+        misses = self.misses - since.get("misses", 0)
+        lookups = hits + misses
+        return {"hits": hits, "misses": misses, "evictions": self.evictions - since.get("evictions", 0),
+                "entries": count, "bytes": total, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Process-wide cache, or None when PERPLEXITY_CACHE_PATH is empty."""
+    global _default_cache
+    if not CACHE_PATH:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(CACHE_PATH)
+        return _default_cache
@@ -0,0 +1,266 @@
+"""
+Canada REAL Engine - Topic Payload Schemas
+PURPOSE: Declarative per-topic schemas for the JSON returned by the API,
+         compiled once at import into plain closures. Validation returns
+         the path and reason of every problem instead of a bare bool, and
+         `repair_payload` fixes the common, harmless faults (numeric
+         strings in chart data, missing `relevance`) before validation.
+
+Schema spec keys:
+    type          expected Python type (dict, list, str, ...), or its name as a string
+                  ("dict", "list", "str", "int", "float", "bool") in specs loaded from JSON
+    required      the key must be present (default False)
+    fields        for dicts: {key: spec}
+    any_of        for dicts: keys of which at least one must be present with the
+                  right type; each one that is present with that type is checked
+    min_items     for lists: minimum length
+    words         for strings: (min, max) word count
+    skip_if_empty an empty value is accepted without checking; a non-empty one is
+                  always checked, even when another `any_of` key matched
+"""
+import re
+
+BASE_SCHEMA = {
+    "type": dict,
+    "fields": {
+        "headline": {"type": str, "required": True},
+        "summary": {"type": str},
+        "regional_content": {"type": dict},
+        "kpis": {"type": list, "required": True, "min_items": 3},
+        "relevance": {
+            "type": dict,
+            "fields": {
+                "program_suggestions": {"type": list},
+                "target_students": {"type": str},
+            },
+        },
+        "chart": {
+            "type": dict,
+            "fields": {
+                "chart_type": {"type": str},
+                "data_points": {"type": list},
+            },
+        },
+    },
+    "any_of": ("summary", "regional_content"),
+}
+
+REGIONS = ("canada", "uk", "europe", "southeast-asia")
+
+IMMIGRATION_SCHEMA = {
+    **BASE_SCHEMA,
+    "fields": {
+        **BASE_SCHEMA["fields"],
+        "regional_content": {
+            "type": dict,
+            "skip_if_empty": True,
+            "fields": {region: {"type": str, "required": True, "words": (80, 120)} for region in REGIONS},
+        },
+    },
+}
+
+# Schemas a topic can name in topics.json (see topic_registry.py).
+NAMED_SCHEMAS = {
+    "base": BASE_SCHEMA,
+    "regional": IMMIGRATION_SCHEMA,
+}
+
+TOPIC_SCHEMAS = {
+    "canada_immigration": IMMIGRATION_SCHEMA,
+}
+
+
+# Type names accepted in specs that come from JSON (topics.json).
+TYPE_NAMES = {"dict": dict, "list": list, "str": str, "int": int, "float": float, "bool": bool}
+
+
+def _resolve_type(expected, path: str):
+    if expected is None or isinstance(expected, type):
+        return expected
+    if expected in TYPE_NAMES:
+        return TYPE_NAMES[expected]
+    raise ValueError(f"{path}: unknown schema type {expected!r} (expected one of {sorted(TYPE_NAMES)})")
+
+
+def _word_count_capped(text: str, cap: int) -> int:
+    # Splitting at most `cap` times bounds the work on very long strings.
+    return len(text.split(None, cap))
+
+
+def compile_schema(spec: dict, path: str = "$"):
+    """Turns a schema spec into `check(value, errors) -> bool`.
+
+    With `errors=None` the check stops at the first problem (fast path for
+    a plain yes/no); with a list it collects every (path, message) tuple.
+    """
+    expected = _resolve_type(spec.get("type"), path)
+    checks = []
+
+    if "min_items" in spec:
+        min_items = spec["min_items"]
+
+        def check_min_items(value, errors):
+            if len(value) >= min_items:
+                return True
+            if errors is not None:
+                errors.append((path, f"expected at least {min_items} items, got {len(value)}"))
+            return False
+        checks.append(check_min_items)
+
+    if "words" in spec:
+        low, high = spec["words"]
+
+        def check_words(value, errors):
+            count = _word_count_capped(value, high + 1)
+            if low <= count <= high:
+                return True
+            if errors is not None:
+                errors.append((path, f"expected {low}-{high} words, got {count if count <= high else f'>{high}'}"))
+            return False
+        checks.append(check_words)
+
+    if "fields" in spec:
+        any_of = tuple(spec.get("any_of", ()))
+        fields = [(key, sub.get("required", False), compile_schema(sub, f"{path}.{key}"))
+                  for key, sub in spec["fields"].items() if key not in any_of]
+        alternatives = [(key, _resolve_type(spec["fields"][key].get("type"), f"{path}.{key}") or object,
+                         spec["fields"][key].get("skip_if_empty", False),
+                         compile_schema(spec["fields"][key], f"{path}.{key}")) for key in any_of]
+        skip_if_empty = spec.get("skip_if_empty", False)
+
+        def check_fields(value, errors):
+            if skip_if_empty and not value:
+                return True
+            ok = True
+            for key, required, sub_check in fields:
+                if key in value:
+                    if not sub_check(value[key], errors):
+                        if errors is None:
+                            return False
+                        ok = False
+                elif required:
+                    if errors is None:
+                        return False
+                    errors.append((f"{path}.{key}", "missing required field"))
+                    ok = False
+            if alternatives:
+                # At least one alternative must have the right type; those that do are fully checked.
+                matched = False
+                for key, alt_type, check_non_empty, sub_check in alternatives:
+                    item = value.get(key)
+                    if isinstance(item, alt_type):
+                        matched = True
+                    elif not (check_non_empty and item):
+                        continue
+                    if not sub_check(item, errors):
+                        if errors is None:
+                            return False
+                        ok = False
+                if not matched:
+                    if errors is None:
+                        return False
+                    errors.append((path, f"expected {' or '.join(alt[0] for alt in alternatives)}"))
+                    ok = False
+            return ok
+        checks.append(check_fields)
+
+    if not checks:
+        # Leaf fields only need the type check.
+        def check(value, errors):
+            if expected is None or isinstance(value, expected):
+                return True
+            if errors is not None:
+                errors.append((path, f"expected {expected.__name__}, got {type(value).__name__}"))
+            return False
+        return check
+
+    def check(value, errors):
+        if expected is not None and not isinstance(value, expected):
+            if errors is not None:
+                errors.append((path, f"expected {expected.__name__}, got {type(value).__name__}"))
+            return False
+        ok = True
+        for sub_check in checks:
+            if not sub_check(value, errors):
+                if errors is None:
+                    return False
+                ok = False
+        return ok
+
+    return check
+
+
+_BASE_VALIDATOR = compile_schema(BASE_SCHEMA)
+_NAMED_VALIDATORS = {name: compile_schema(spec) for name, spec in NAMED_SCHEMAS.items()}
+_VALIDATORS = {topic_id: compile_schema(spec) for topic_id, spec in TOPIC_SCHEMAS.items()}
+
+
+def register_topic_schema(topic_id: str, schema) -> None:
+    """Uses `schema` (a NAMED_SCHEMAS name or a spec dict) for `topic_id`.
+
+    Named schemas share one compiled validator however many topics use them.
+    Raises ValueError for an unknown name or type in the spec.
+    """
+    if isinstance(schema, str):
+        if schema not in NAMED_SCHEMAS:
+            raise ValueError(f"Topic {topic_id}: unknown schema '{schema}' (expected one of {sorted(NAMED_SCHEMAS)})")
+        TOPIC_SCHEMAS[topic_id] = NAMED_SCHEMAS[schema]
+        _VALIDATORS[topic_id] = _NAMED_VALIDATORS[schema]
+    else:
+        TOPIC_SCHEMAS[topic_id] = schema
+        _VALIDATORS[topic_id] = compile_schema(schema)
+
+
+def _validator_for(topic_id):
+    return _VALIDATORS.get(topic_id, _BASE_VALIDATOR) if isinstance(topic_id, str) else _BASE_VALIDATOR
+
+
+def validate_payload(payload, topic_id: str = None) -> list:
+    """Returns a list of "path: reason" strings; empty when the payload is valid."""
+    errors = []
+    _validator_for(topic_id)(payload, errors)
+    return [f"{path}: {message}" for path, message in errors]
+
+
+def is_valid(payload, topic_id: str = None) -> bool:
+    return _validator_for(topic_id)(payload, None)
+
+
+_NUMBER_RE = re.compile(r"^[\s+]*(-?)[\s$€£]*([\d,]*\.?\d+)\s*(%|[kKmMbB])?\s*$")
+_SCALE = {"k": 1e3, "m": 1e6, "b": 1e9}
+
+
+def parse_number(text: str):
+    """Parses "1,234", "12.5%", "-3", "$4.2B" into a float; returns None otherwise."""
+    match = _NUMBER_RE.match(text.replace("−", "-"))
+    if not match:
+        return None
+    sign, digits, suffix = match.groups()
+    value = float(digits.replace(",", ""))
+    if suffix and suffix != "%":
+        value *= _SCALE[suffix.lower()]
+    return -value if sign else value
+
+
+def repair_payload(payload, topic_id: str = None) -> list:
+    """Fixes common harmless faults in place; returns a description of each repair."""
+    repairs = []
+    if not isinstance(payload, dict):
+        return repairs
+    relevance = payload.get("relevance")
+    if relevance is None:
+        payload["relevance"] = {"program_suggestions": [], "target_students": ""}
+        repairs.append("$.relevance: added empty relevance")
+    chart = payload.get("chart")
+    if isinstance(chart, dict) and isinstance(chart.get("data_points"), list):
+        for index, point in enumerate(chart["data_points"]):
+            if isinstance(point, dict) and isinstance(point.get("value"), str):
+                number = parse_number(point["value"])
+                if number is not None:
+                    point["value"] = int(number) if number.is_integer() else number
+                    repairs.append(f"$.chart.data_points[{index}].value: parsed numeric string")
+    summary = payload.get("summary")
+    if isinstance(summary, list) and all(isinstance(part, str) for part in summary):
+        payload["summary"] = " ".join(summary)
+        repairs.append("$.summary: joined list of paragraphs")
+    return repairs
@@ -0,0 +1,276 @@
+"""
+Canada REAL Engine - Snapshot Cache
+PURPOSE: Keeps the parsed `real-engine-data.json` document and its
+         pre-encoded response bytes in memory so the web process does not
+         re-read, re-parse and re-serialize the file on every request.
+         The file is only re-read when its mtime/size/inode changes, and
+         that check runs at most once per `check_interval` seconds.
+         The generator publishes the file with an atomic `os.replace`
+         (see storage.py), so every publish changes the inode and a reload
+         never observes a half-written file.
+
+         When the generator also published a snapshot pack (see
+         snapshot_pack.py) for the current file, the snapshot is mapped from
+         the pack instead, and its bodies are shared by every worker.
+"""
+import datetime
+import hashlib
+import os
+import threading
+import time
+
+import codec
+from compression import build_variants
+from metrics import SNAPSHOT_RELOAD_FAILURES, SNAPSHOT_RELOADS
+from snapshot_pack import PACK_PATH, MappedBody, file_signature, open_pack, transform_name
+
+DEFAULT_CHECK_INTERVAL = float(os.environ.get("SNAPSHOT_CHECK_INTERVAL", "2.0"))
+
+
+# Bound on memoized ?fields= projections per snapshot; rarer combinations are encoded per request.
+MAX_PROJECTIONS = int(os.environ.get("SNAPSHOT_MAX_PROJECTIONS", "64"))
+
+
+def encode_json(obj) -> bytes:
+    return codec.dumps(obj)
+
+
+class EncodedBody:
+    """Response bytes with their strong ETag and compressed variants."""
+    __slots__ = ("body", "etag", "variants")
+
+    def __init__(self, body: bytes, fast: bool = False):
+        self.body = body
+        # Strong validator: identical bytes always yield the same ETag, across workers and restarts.
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        # Content-Encoding -> bytes, compressed once (cheaply when `fast`, for one-off bodies).
+        self.variants = build_variants(body, fast)
+
+
+class Snapshot:
+    """An immutable view of one version of the data file.
+
+    Besides the whole document, each topic is pre-encoded on its own
+    (`topics`), and `?fields=` projections are encoded once on first use.
+    Only projections of existing fields are memoized (up to MAX_PROJECTIONS);
+    any other is encoded per request with cheap compression.
+    """
+    __slots__ = ("data", "signature", "loaded_at", "last_modified", "full", "topics", "_projections", "_lock",
+                 "_field_names")
+
+    def __init__(self, data: dict, body: bytes, signature: tuple, last_modified: datetime.datetime = None):
+        self.data = data
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.last_modified = (last_modified or datetime.datetime.now(datetime.timezone.utc)).replace(microsecond=0)
+        self.full = EncodedBody(body)
+        self.topics = {topic_id: EncodedBody(encode_json(payload)) for topic_id, payload in data.items()}
+        self._projections = {}
+        self._lock = threading.Lock()
+        self._field_names = None
+
+    @property
+    def field_names(self) -> frozenset:
+        """Every top-level key of any topic payload, i.e. the valid `?fields=` names."""
+        if self._field_names is None:
+            self._field_names = frozenset(key for payload in self.data.values() if isinstance(payload, dict)
+                                          for key in payload)
+        return self._field_names
+
+    @property
+    def body(self) -> bytes:
+        return self.full.body
+
+    @property
+    def etag(self) -> str:
+        return self.full.etag
+
+    @property
+    def variants(self) -> dict:
+        return self.full.variants
+
+    def projection(self, topic_id: str = None, fields: tuple = ()) -> EncodedBody:
+        """Encoded body for the whole document or one topic, optionally limited to `fields`.
+
+        Returns None when `topic_id` is unknown.
+        """
+        if topic_id is not None and topic_id not in self.topics:
+            return None
+        if not fields:
+            return self.full if topic_id is None else self.topics[topic_id]
+        key = (topic_id, fields)
+        encoded = self._projections.get(key)
+        if encoded is not None:
+            return encoded
+
+        def pick(payload):
+            return {field: payload[field] for field in fields if isinstance(payload, dict) and field in payload}
+
+        # Made-up field names must not use up the memo slots of real projections.
+        memoize = len(self._projections) < MAX_PROJECTIONS and self.field_names.issuperset(fields)
+        if topic_id is None:
+            body = encode_json({tid: pick(payload) for tid, payload in self.data.items()})
+        else:
+            body = encode_json(pick(self.data[topic_id]))
+        encoded = EncodedBody(body, fast=not memoize)
+        if memoize:
+            with self._lock:
+                if len(self._projections) < MAX_PROJECTIONS:
+                    self._projections[key] = encoded
+        return encoded
+
+
+class MappedSnapshot(Snapshot):
+    """A Snapshot whose bodies are slices of a memory-mapped snapshot pack.
+
+    The parsed document is only built when something needs it (`?fields=`
+    projections, inline dashboard data), from the mapped bytes.
+    """
+    __slots__ = ("version", "_data")
+
+    def __init__(self, index: dict, view: memoryview, signature: tuple):
+        self.version = index["version"]
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.last_modified = datetime.datetime.fromisoformat(index["last_modified"]).replace(microsecond=0)
+        self.full = MappedBody(view, index["full"])
+        self.topics = {topic_id: MappedBody(view, entry) for topic_id, entry in index["topics"].items()}
+        self._data = None
+        self._projections = {}
+        self._lock = threading.Lock()
+        self._field_names = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = codec.loads(self.full.body)
+        return self._data
+
+
+
+class SnapshotCache:
+    """Process-wide cache of the latest data snapshot.
+
+    `get()` returns the current Snapshot. Between checks it is a plain
+    attribute read; once the check interval has elapsed a single thread
+    stats the file and reloads it if the signature changed. If the file is
+    missing, FileNotFoundError is raised; if it cannot be decoded and no
+    earlier snapshot exists, ValueError is raised. A previously loaded
+    snapshot is kept and served when a reload fails.
+    """
+
+    def __init__(self, path: str, check_interval: float = DEFAULT_CHECK_INTERVAL, transform=None,
+                 pack_path: str = PACK_PATH):
+        self.path = os.path.abspath(path)
+        # Shared pre-encoded copy of `path` written by the generator; "" or None to always parse `path`.
+        self.pack_path = os.path.abspath(pack_path) if pack_path else None
+        self.check_interval = check_interval
+        # Optional `transform(data) -> data` applied once per load, before encoding.
+        self.transform = transform
+        self._snapshot = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            return snapshot
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock.
+            if self._snapshot is not None and time.monotonic() < self._next_check:
+                return self._snapshot
+            return self._refresh()
+
+    def publish(self, data: dict) -> Snapshot:
+        """Swaps in `data` (just written to `path`) without re-reading the file."""
+        with self._lock:
+            try:
+                st, signature = self._stat()
+            except FileNotFoundError:
+                st = signature = None
+            snapshot = self._build(self._apply_transform(data), st, signature)
+            self._snapshot = snapshot
+            self._next_check = time.monotonic() + self.check_interval
+        SNAPSHOT_RELOADS.inc(source="publish")
+        print(f"🧾 Published new Canada REAL Engine snapshot in memory ({len(snapshot.body)} bytes)")
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Force the next `get()` to re-check the file."""
+        self._next_check = 0.0
+
+    def _refresh(self) -> Snapshot:
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            st, signature = self._stat()
+        except FileNotFoundError:
+            if self._snapshot is not None:
+                return self._snapshot
+            raise
+        if self._snapshot is not None and self._snapshot.signature == signature:
+            return self._snapshot
+        if signature[1] is not None:
+            snapshot = self._open_pack(signature)
+            if snapshot is not None:
+                self._snapshot = snapshot
+                SNAPSHOT_RELOADS.inc(source="pack")
+                print(f"🧾 Mapped Canada REAL Engine snapshot pack from: {self.pack_path} "
+                      f"({len(snapshot.body)} bytes, version {snapshot.version})")
+                return snapshot
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            data = codec.loads(raw)
+        except (OSError, ValueError):
+            print(f"❌ Error: Could not decode JSON from {self.path}. Keeping previous snapshot.")
+            SNAPSHOT_RELOAD_FAILURES.inc()
+            if self._snapshot is not None:
+                return self._snapshot
+            raise ValueError(f"Could not decode JSON from {self.path}")
+        self._snapshot = self._build(self._apply_transform(data), st, signature)
+        SNAPSHOT_RELOADS.inc(source="file")
+        print(f"🧾 Loaded Canada REAL Engine snapshot from: {self.path} ({len(self._snapshot.body)} bytes)")
+        return self._snapshot
+
+    def _stat(self) -> tuple:
+        """(stat of `path`, signature of `path` and the pack). Raises FileNotFoundError without `path`."""
+        st = os.stat(self.path)
+        pack_signature = None
+        if self.pack_path:
+            try:
+                pack_signature = file_signature(os.stat(self.pack_path))
+            except FileNotFoundError:
+                pass
+        return st, (file_signature(st), pack_signature)
+
+    def _open_pack(self, signature: tuple):
+        """Maps the pack if it was built from the current data file with our transform, else None."""
+        try:
+            index, view, pack_signature = open_pack(self.pack_path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring Canada snapshot pack {self.pack_path}: {e}")
+            return None
+        if index.get("source") != list(signature[0]) or index.get("transform") != transform_name(self.transform):
+            # Left over from an earlier data file (or written for another transform); parse the JSON instead.
+            print(f"⚠️ Canada snapshot pack {self.pack_path} does not match {self.path}; parsing the data file.")
+            return None
+        return MappedSnapshot(index, view, (signature[0], pack_signature))
+
+    def _apply_transform(self, data: dict) -> dict:
+        if self.transform is None:
+            return data
+        try:
+            return self.transform(data)
+        except Exception as e:
+            print(f"❌ Error: Snapshot transform failed ({e}). Serving the data untransformed.")
+            return data
+
+    @staticmethod
+    def _build(data: dict, st, signature: tuple) -> Snapshot:
+        body = encode_json(data)
+        if st is None:
+            return Snapshot(data, body, None)
+        last_modified = datetime.datetime.fromtimestamp(st.st_mtime, datetime.timezone.utc)
+        return Snapshot(data, body, signature, last_modified)
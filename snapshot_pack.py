@@ -0,0 +1,136 @@
+"""
+Canada REAL Engine - Shared Snapshot Pack
+PURPOSE: One pre-encoded, memory-mapped copy of the data snapshot for all
+         web workers. The generator writes `real-engine-data.pack` next to
+         `real-engine-data.json`: a small header, a JSON index and then every
+         response body (whole document and each topic, identity plus
+         gzip/br variants) back to back. Each worker maps the file read-only
+         and serves slices of the mapping, so the bodies live once in the OS
+         page cache however many workers run.
+
+Layout:
+    magic    8 bytes  b"RESNAP01"
+    version  u64      publish time in ns, increases with every publish
+    length   u32      size of the index
+    index    JSON     {"version", "source", "transform", "last_modified", "size",
+                       "full": {"etag", "variants": {encoding: [offset, length]}},
+                       "topics": {topic_id: {"etag", "variants": {...}}}}
+    bodies            offsets in the index are relative to the end of the index
+
+The pack is published with an atomic `os.replace` (see storage.py), so a
+worker maps either the complete old file or the complete new one; mappings
+of the old file stay valid until the last request using them finishes.
+`source` is the signature of the JSON file the pack was built from; a pack
+that does not match the current JSON file is ignored (see snapshot_cache.py).
+
+Usage: python snapshot_pack.py   # (re)build the pack from real-engine-data.json
+"""
+import datetime
+import mmap
+import os
+import struct
+import time
+
+import codec
+from storage import atomic_write_bytes
+
+# Empty disables the pack; workers then parse and encode the JSON file themselves.
+PACK_PATH = os.environ.get("REAL_ENGINE_SNAPSHOT_PACK", "real-engine-data.pack")
+
+MAGIC = b"RESNAP01"
+HEADER = struct.Struct("<8sQI")
+
+
+def file_signature(st: os.stat_result) -> tuple:
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def transform_name(transform) -> str:
+    """Stable name of a snapshot transform, recorded in the pack and checked by readers."""
+    if transform is None:
+        return None
+    return f"{transform.__module__}.{transform.__qualname__}"
+
+
+class MappedBody:
+    """Like snapshot_cache.EncodedBody, but the variants are memoryview slices of the pack."""
+    __slots__ = ("body", "etag", "variants")
+
+    def __init__(self, view: memoryview, entry: dict):
+        self.etag = entry["etag"]
+        self.variants = {encoding: view[offset:offset + length]
+                         for encoding, (offset, length) in entry["variants"].items()}
+        self.body = self.variants["identity"]
+
+
+def build_pack(data: dict, source_signature: tuple, transform=None, version: int = None) -> bytes:
+    """Encodes `data` (already transformed) into pack bytes."""
+    # Imported here: snapshot_cache imports this module for reading packs.
+    from snapshot_cache import EncodedBody, encode_json
+
+    blobs = []
+    offset = 0
+
+    def place(encoded) -> dict:
+        nonlocal offset
+        variants = {}
+        for encoding, body in encoded.variants.items():
+            variants[encoding] = [offset, len(body)]
+            blobs.append(body)
+            offset += len(body)
+        return {"etag": encoded.etag, "variants": variants}
+
+    version = version or time.time_ns()
+    index = {
+        "version": version,
+        "source": list(source_signature),
+        "transform": transform_name(transform),
+        "last_modified": datetime.datetime.fromtimestamp(source_signature[0] / 1e9,
+                                                         datetime.timezone.utc).isoformat(),
+        "full": place(EncodedBody(encode_json(data))),
+        "topics": {topic_id: place(EncodedBody(encode_json(payload))) for topic_id, payload in data.items()},
+    }
+    index["size"] = offset
+    index_bytes = codec.dumps(index)
+    return b"".join([HEADER.pack(MAGIC, version, len(index_bytes)), index_bytes] + blobs)
+
+
+def write_pack(path: str, data: dict, source_path: str, transform=None) -> int:
+    """Publishes the pack for `data`, which was just written to `source_path`. Returns the version."""
+    if transform is not None:
+        # The transform works in place; keep the caller's document untouched.
+        data = transform(codec.loads(codec.dumps(data)))
+    pack = build_pack(data, file_signature(os.stat(source_path)), transform)
+    atomic_write_bytes(path, pack)
+    version = HEADER.unpack_from(pack)[1]
+    print(f"🗜️ Published shared Canada snapshot pack to '{path}' ({len(pack)} bytes, version {version})")
+    return version
+
+
+def open_pack(path: str):
+    """Maps a pack read-only. Returns (index, memoryview of the bodies, pack file signature).
+
+    Raises FileNotFoundError if there is no pack, ValueError if it is malformed.
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size < HEADER.size:
+            raise ValueError(f"{path} is not a snapshot pack")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, index_length = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a snapshot pack")
+    start = HEADER.size + index_length
+    index = codec.loads(mapped[HEADER.size:start])
+    if index.get("version") != version or start + index.get("size", -1) != st.st_size:
+        raise ValueError(f"{path} is truncated or inconsistent")
+    return index, memoryview(mapped)[start:], file_signature(st)
+
+
+if __name__ == "__main__":
+    from kpi_normalizer import attach_normalized_kpis
+
+    source = "real-engine-data.json"
+    with open(source, "rb") as f:
+        document = codec.loads(f.read())
+    write_pack(PACK_PATH or "real-engine-data.pack", document, source, transform=attach_normalized_kpis)
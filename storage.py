@@ -0,0 +1,91 @@
+"""
+Canada REAL Engine - Crash-safe Storage
+PURPOSE: Atomic file writes (write to a temp file in the same directory,
+         fsync, then `os.replace`) so readers only ever see a complete old
+         or a complete new file, plus an optional versioned history
+         directory with retention.
+"""
+import datetime
+import os
+import tempfile
+
+import codec
+
+# When set, every published data file is also copied here as a timestamped version.
+HISTORY_DIR = os.environ.get("REAL_ENGINE_HISTORY_DIR", "")
+HISTORY_RETENTION = int(os.environ.get("REAL_ENGINE_HISTORY_RETENTION", "28"))
+
+
+def _fsync_dir(directory: str) -> None:
+    # Persists the rename itself; not supported on every platform.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        # mkstemp creates 0600 files; keep the published file's usual permissions.
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(directory)
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path: str, obj, pretty: bool = False) -> None:
+    atomic_write_bytes(path, codec.dumps(obj, pretty=pretty))
+
+
+def archive_version(path: str, history_dir: str = None, retention: int = None) -> str:
+    """Copies `path` into the history directory as `<name>.<UTC timestamp><ext>`.
+
+    Keeps the newest `retention` versions and returns the archived path, or
+    "" when history is disabled.
+    """
+    history_dir = HISTORY_DIR if history_dir is None else history_dir
+    retention = HISTORY_RETENTION if retention is None else retention
+    if not history_dir:
+        return ""
+    os.makedirs(history_dir, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    target = os.path.join(history_dir, f"{stem}.{stamp}{ext}")
+    with open(path, "rb") as f:
+        atomic_write_bytes(target, f.read())
+    prune_history(history_dir, stem, ext, retention)
+    return target
+
+
+def prune_history(history_dir: str, stem: str, ext: str, retention: int) -> None:
+    versions = sorted(
+        name for name in os.listdir(history_dir)
+        if name.startswith(f"{stem}.") and name.endswith(ext) and not name.startswith(".")
+    )
+    for name in versions[:max(0, len(versions) - retention)]:
+        os.unlink(os.path.join(history_dir, name))
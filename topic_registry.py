@@ -0,0 +1,123 @@
+"""
+Canada REAL Engine - Topic Registry
+PURPOSE: The list of dashboard topics, loaded once from `topics.json`
+         (`REAL_ENGINE_TOPICS_FILE`) instead of being hard-coded in the
+         generator, the prompt lookup and the dashboard. Topics are grouped
+         into profiles (a country or sector); `REAL_ENGINE_PROFILES`
+         selects which profiles this deployment runs.
+
+Each topic entry:
+    id             unique across all profiles; key in real-engine-data.json
+    title          dashboard heading
+    prompt         inline prompt text, or
+    prompt_ref     name of a prompt constant in prompt_utils.py, or
+    prompt_file    path of a text file (relative to the config file)
+    schema         "base" (default), "regional", or an inline schema spec (see schemas.py)
+    layout         "standard" (default) or "regional" (four regional paragraphs)
+    refresh_hours  per-topic refresh interval (default RUN_INTERVAL_HOURS)
+
+Lookups are dicts keyed by topic id, so the number of topics does not
+affect the cost of finding one.
+"""
+import os
+import threading
+
+import codec
+import schemas
+
+TOPICS_FILE = os.environ.get("REAL_ENGINE_TOPICS_FILE",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), "topics.json"))
+# Comma-separated profile names to run; empty runs every profile in the file.
+ACTIVE_PROFILES = [name.strip() for name in os.environ.get("REAL_ENGINE_PROFILES", "").split(",") if name.strip()]
+
+LAYOUTS = ("standard", "regional")
+
+
+class Topic:
+    __slots__ = ("id", "title", "profile", "schema", "layout", "refresh_hours", "_prompt", "_prompt_ref",
+                 "_prompt_file")
+
+    def __init__(self, topic_id: str, profile: str, spec: dict, base_dir: str):
+        self.id = topic_id
+        self.profile = profile
+        self.title = spec.get("title") or topic_id
+        self.schema = spec.get("schema", "base")
+        self.layout = spec.get("layout", "standard")
+        if self.layout not in LAYOUTS:
+            raise ValueError(f"Topic {topic_id}: unknown layout '{self.layout}' (expected one of {LAYOUTS})")
+        hours = spec.get("refresh_hours")
+        self.refresh_hours = float(hours) if hours is not None else None
+        self._prompt = spec.get("prompt")
+        self._prompt_ref = spec.get("prompt_ref")
+        prompt_file = spec.get("prompt_file")
+        self._prompt_file = os.path.join(base_dir, prompt_file) if prompt_file else None
+
+    @property
+    def prompt(self) -> str:
+        """The topic's prompt, resolved on first use (keeps the web process free of prompt_utils)."""
+        if self._prompt is None:
+            if self._prompt_file:
+                with open(self._prompt_file, "r", encoding="utf-8") as f:
+                    self._prompt = f.read()
+            else:
+                import prompt_utils
+
+                self._prompt = getattr(prompt_utils, self._prompt_ref or "CANADA_BASE_PROMPT")
+        return self._prompt
+
+    def dashboard_entry(self, profile_title: str) -> dict:
+        return {"id": self.id, "title": self.title, "layout": self.layout, "profile": self.profile,
+                "profile_title": profile_title}
+
+
+class TopicRegistry:
+    def __init__(self, config: dict, base_dir: str = ".", profiles: list = None):
+        self.topics = {}
+        self.profiles = {}
+        self.profile_titles = {}
+        available = config.get("profiles") or {}
+        unknown = set(profiles or ()) - set(available)
+        if unknown:
+            raise ValueError(f"Unknown profile(s) in REAL_ENGINE_PROFILES: {', '.join(sorted(unknown))}")
+        for name, profile in available.items():
+            if profiles and name not in profiles:
+                continue
+            self.profile_titles[name] = profile.get("title") or name
+            ids = self.profiles[name] = []
+            for spec in profile.get("topics") or []:
+                topic_id = spec["id"]
+                if topic_id in self.topics:
+                    raise ValueError(f"Topic id '{topic_id}' is defined twice (ids must be unique across profiles)")
+                topic = Topic(topic_id, name, spec, base_dir)
+                self.topics[topic_id] = topic
+                ids.append(topic_id)
+                schemas.register_topic_schema(topic_id, topic.schema)
+
+    @classmethod
+    def load(cls, path: str = TOPICS_FILE, profiles: list = None) -> "TopicRegistry":
+        with open(path, "rb") as f:
+            config = codec.loads(f.read())
+        return cls(config, os.path.dirname(os.path.abspath(path)), profiles)
+
+    def get(self, topic_id: str) -> Topic:
+        return self.topics.get(topic_id)
+
+    def ids(self, profile: str = None) -> list:
+        return list(self.profiles.get(profile, ())) if profile else list(self.topics)
+
+    def dashboard_sections(self) -> list:
+        return [topic.dashboard_entry(self.profile_titles[topic.profile]) for topic in self.topics.values()]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> TopicRegistry:
+    """Process-wide registry, loaded from TOPICS_FILE on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TopicRegistry.load(TOPICS_FILE, ACTIVE_PROFILES)
+    return _registry